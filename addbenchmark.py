@@ -1,9 +1,8 @@
 #!/usr/bin/env python3
 
-import sqlite3
 import argparse
 from pathlib import Path
-from modules import benchmarks
+from modules import ingest
 
 parser = argparse.ArgumentParser(
     prog="addbenchmark.py", description="Adds a benchmark to the database."
@@ -17,4 +16,4 @@ args = parser.parse_args()
 if not args.BENCHMARK.exists():
     raise Exception("Benchmark file does not exist.")
 
-benchmarks.add_benchmark(args.DB_FILE, args.BENCHMARK, args.DOLMEN_BIN)
+ingest.add_benchmark(args.DB_FILE, args.BENCHMARK, args.DOLMEN_BIN)
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+
+"""
+Applies a delta written by `make_delta.py` to the old release of the
+database.  The database file is changed in place.
+"""
+
+import sys
+import argparse
+from pathlib import Path
+from modules import database, delta
+
+parser = argparse.ArgumentParser(
+    prog="apply_delta.py",
+    description="Applies a delta to the old release of the database.",
+)
+parser.add_argument("DB_FILE", type=Path, help="old release, changed in place")
+parser.add_argument("DELTA_FILE", type=Path)
+args = parser.parse_args()
+
+connection = database.connect_bulk(args.DB_FILE)
+connection.execute("ATTACH DATABASE ? AS delta", (str(args.DELTA_FILE),))
+mismatches = delta.apply_delta(connection)
+connection.commit()
+connection.execute("DETACH DATABASE delta")
+database.end_bulk_load(connection)
+connection.execute("VACUUM")
+connection.close()
+if mismatches:
+    sys.exit(1)
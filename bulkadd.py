@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+
+"""
+Adds many benchmarks to the database.
+
+In contrast to `addbenchmark.py` this script is started only once.  The
+benchmark files are analyzed by a pool of worker processes, and all
+results are written by a single writer thread that commits in batches
+(see `modules.ingest`).
+
+A source can also be a `.tar.zst` release archive.  Its members are
+decompressed on the fly and handed to the analysis tools as in-memory
+files, hence the library does not need to be unpacked.
+
+Files are hashed first.  If the content of a file was already analyzed,
+the analysis is copied instead of running klhm and Dolmen again.
+
+Every added file is recorded in the Manifest table.  With `--incremental`
+only new or changed files are analyzed, and benchmarks built from files
+that no longer exist are removed.  In this mode the sources must cover the
+whole benchmark library.
+
+Since a benchmark and its manifest entry are committed together, the
+manifest is also the journal of completed files.  After an interrupted run,
+`--resume` skips all files in the manifest, and removes benchmarks that
+were written without a manifest entry.
+
+With `--shard K/N` only the K-th of N shards of the benchmarks is added.
+The shards can be built into separate database files on different hosts,
+and are then combined by `merge_shards.py`.
+"""
+
+import os
+import sys
+import argparse
+import threading
+import multiprocessing
+from pathlib import Path
+from modules import ingest, manifest, dolmen, executor, database, shards
+
+
+def collect_benchmarks(sources, listFile):
+    """
+    Yields the benchmarks to add as pairs (path, member).  A source is
+    either a benchmark file, a folder that is searched for `.smt2` files, or
+    a `.tar.zst` archive.  For archive members, member is as described in
+    `ingest.read_archive`, otherwise it is None.  The optional `listFile`
+    contains one path per line ('-' reads from stdin).
+    """
+    for source in sources:
+        if source.is_dir():
+            for benchmark in sorted(source.rglob("*.smt2")):
+                yield benchmark, None
+        elif source.name.endswith(".tar.zst"):
+            yield from ingest.read_archive(source)
+        else:
+            yield source, None
+    if listFile:
+        fileList = sys.stdin if str(listFile) == "-" else open(listFile)
+        for line in fileList:
+            line = line.strip()
+            if line:
+                yield Path(line), None
+
+
+parser = argparse.ArgumentParser(
+    prog="bulkadd.py", description="Adds many benchmarks to the database."
+)
+
+parser.add_argument("DB_FILE", type=Path)
+parser.add_argument("DOLMEN_BIN", type=Path)
+parser.add_argument(
+    "SOURCES",
+    type=Path,
+    nargs="*",
+    help="benchmark files, folders with .smt2 files, or .tar.zst archives",
+)
+parser.add_argument(
+    "--from-list",
+    type=Path,
+    help="file with one benchmark path per line, '-' for stdin",
+)
+parser.add_argument(
+    "-j",
+    "--jobs",
+    type=int,
+    default=os.cpu_count(),
+    help="number of analysis worker processes",
+)
+parser.add_argument(
+    "--batch-size",
+    type=int,
+    default=100,
+    help="commit after this many benchmarks",
+)
+parser.add_argument(
+    "--batch-seconds",
+    type=float,
+    default=10.0,
+    help="commit at least this often",
+)
+parser.add_argument(
+    "--incremental",
+    action="store_true",
+    help="only analyze new or changed files and remove deleted ones",
+)
+parser.add_argument(
+    "--resume",
+    action="store_true",
+    help="continue an interrupted run: skip files that were already added",
+)
+parser.add_argument(
+    "--shard",
+    type=shards.parse_shard,
+    metavar="K/N",
+    help="only add the benchmarks in the K-th of N shards",
+)
+parser.add_argument(
+    "--shard-by",
+    choices=["path", "logic"],
+    default="path",
+    help="partition benchmarks by their path (default) or their logic",
+)
+parser.add_argument(
+    "--dolmen-cache",
+    type=Path,
+    help="SQLite file that caches Dolmen results across builds",
+)
+parser.add_argument(
+    "--stats",
+    type=Path,
+    help="append per-file stage timings to this JSONL file (see ingeststats.py)",
+)
+parser.add_argument(
+    "--tool-timeout",
+    action="append",
+    metavar="TOOL=SECONDS",
+    help="wall clock limit for a run of klhm or dolmen (repeatable)",
+)
+parser.add_argument(
+    "--tool-memory",
+    action="append",
+    metavar="TOOL=GB",
+    help="address space limit for klhm or dolmen (repeatable)",
+)
+args = parser.parse_args()
+
+if not args.SOURCES and not args.from_list:
+    parser.error("no benchmarks given")
+if args.incremental and args.resume:
+    parser.error("--incremental and --resume cannot be combined")
+
+known = {}
+if args.incremental or args.resume:
+    connection = database.connect_bulk(args.DB_FILE)
+    if args.resume:
+        orphans = manifest.remove_orphans(connection)
+        connection.commit()
+        print(f"Removed {orphans} partially added benchmarks.")
+    known = manifest.load_manifest(connection)
+    connection.close()
+seen = set()
+
+
+# Archive members are read by the main process and sent to the workers.
+# Limit the number of jobs in flight, such that the pool does not read
+# ahead through a whole archive.
+slots = threading.Semaphore(16 * args.jobs)
+
+
+def make_job(benchmark, knownHash, member):
+    slots.acquire()
+    if not member:
+        return benchmark, knownHash, None
+    archive, size, mtime, read = member
+    return benchmark, knownHash, (archive, read(), mtime)
+
+
+def make_jobs():
+    """
+    Yields the jobs for `ingest.analyze_job`.  Benchmarks in other shards
+    are skipped.  In incremental mode, files
+    with unchanged size and modification time are skipped and their content
+    is claimed, and for changed files the known content hash is passed
+    along.  When resuming, all
+    files in the manifest are skipped.
+    """
+    for benchmark, member in collect_benchmarks(args.SOURCES, args.from_list):
+        if args.shard:
+            shard, shardCount = args.shard
+            try:
+                if shards.shard_of(benchmark, shardCount, args.shard_by) != shard:
+                    continue
+            except Exception as e:
+                print(f"ERROR: {benchmark}: {e}")
+                continue
+        if args.resume:
+            try:
+                key = manifest.manifest_key(benchmark)
+            except Exception as e:
+                print(f"ERROR: {benchmark}: {e}")
+                continue
+            if not key in known:
+                yield make_job(benchmark, None, member)
+            continue
+        if not args.incremental:
+            yield make_job(benchmark, None, member)
+            continue
+        try:
+            key = manifest.manifest_key(benchmark)
+            if member:
+                size, mtime = member[1], member[2]
+            else:
+                stat = benchmark.stat()
+                size, mtime = stat.st_size, stat.st_mtime_ns
+        except Exception as e:
+            print(f"ERROR: {benchmark}: {e}")
+            continue
+        seen.add(key)
+        if key in known:
+            knownSize, knownMtime, contentHash = known[key]
+            if knownSize == size and knownMtime == mtime:
+                claims.setdefault(contentHash, key)
+                continue
+            yield make_job(benchmark, contentHash, member)
+        else:
+            yield make_job(benchmark, None, member)
+
+
+dolmenVersion = None
+if args.dolmen_cache:
+    dolmenVersion = dolmen.dolmen_version(args.DOLMEN_BIN)
+
+writer = ingest.BenchmarkWriter(
+    args.DB_FILE,
+    args.batch_size,
+    args.batch_seconds,
+    args.dolmen_cache,
+    dolmenVersion,
+    args.stats,
+)
+limits = executor.parse_limit_options(args.tool_timeout, args.tool_memory)
+# Identical files are only analyzed once.  The content hashes of the files
+# whose benchmarks are kept are claimed, such that they are copied from the
+# database.  When resuming, these are all files in the manifest.  In
+# incremental mode, a file is claimed once it is found unchanged (see
+# `make_jobs`), since the old content of a changed file is deleted with its
+# benchmark.
+manager = multiprocessing.Manager()
+claims = manager.dict()
+if args.resume:
+    claims.update({contentHash: key for key, (_, _, contentHash) in known.items()})
+workerArgs = (args.DOLMEN_BIN, args.dolmen_cache, dolmenVersion, limits, claims)
+failures = 0
+with multiprocessing.Pool(args.jobs, ingest.init_worker, workerArgs) as pool:
+    # Start the writer after forking the workers.
+    writer.start()
+    try:
+        for record, error in pool.imap_unordered(
+            ingest.analyze_job, make_jobs(), chunksize=4
+        ):
+            slots.release()
+            if error:
+                print(f"ERROR: {error}")
+                failures = failures + 1
+                continue
+            writer.put(record)
+
+        if args.incremental:
+            for key in known.keys() - seen:
+                writer.put({"action": "remove", "key": key})
+    finally:
+        # Also commits what was written before an error, otherwise the
+        # writer thread would keep the process alive.
+        writer.close()
+
+failures = failures + writer.failures
+if failures > 0:
+    print(f"WARNING: {failures} benchmarks could not be added.")
+    sys.exit(1)
@@ -9,15 +9,15 @@ sqlite3 "$1" "create index benchIdx1 on Benchmarks(name, family, logic, isIncrem
 echo "Add index for Queries table"
 sqlite3 "$1" "create index benchIdx2 on Queries(benchmark, status, inferredStatus);"
 
+echo "Add index for the logic of benchmarks"
+sqlite3 "$1" "create index benchIdx4 on Benchmarks(logic);"
+
 echo "Add index for Families table"
 sqlite3 "$1" "create index benchIdx3 on Families(name, folderName, firstOccurrence);"
 
 echo "Add index for Symbols table"
 sqlite3 "$1" "create index evalIdx1 on Symbols(name);"
 
-echo "Add index for SymbolCounts table"
-sqlite3 "$1" "create index evalIdx2 on SymbolCounts(symbol, query, count);"
-
 echo "Add index for SolverVariants table"
 sqlite3 "$1" "create index evalIdx4 on SolverVariants(solver);"
 
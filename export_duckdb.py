@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+"""
+Writes a DuckDB companion file of a database file.
+
+The SQLite file stays the canonical format.  The companion file has the
+same tables, columns, and views, but DuckDB stores the tables column by
+column and runs queries vectorized on all cores, hence large aggregations
+over the results (the timeline counts, the inferred status, the studies)
+are much faster.  Constraints and indexes are not copied.  Dates are kept
+as ISO 8601 text, as in the SQLite file, such that queries that compare
+them with strings work on both files.
+
+By default, the file is written next to the database file, with the suffix
+`.duckdb`.  The scripts in `studies` and `static-page` read it with the
+option `--duckdb`.  Needs the `duckdb` package (the dependency group
+`duckdb` in `pyproject.toml`), which loads its `sqlite` extension.
+"""
+
+import os
+import sqlite3
+import argparse
+from pathlib import Path
+
+import duckdb
+
+
+def duckdb_type(declaredType):
+    """
+    Returns the DuckDB type of a column by the SQLite affinity rules of its
+    declared type.  Booleans and dates are special cased.
+    """
+    declaredType = declaredType.upper()
+    if "BOOL" in declaredType:
+        return "BOOLEAN"
+    if "INT" in declaredType:
+        return "BIGINT"
+    if any(t in declaredType for t in ["CHAR", "CLOB", "TEXT"]):
+        return "VARCHAR"
+    if declaredType == "" or "BLOB" in declaredType:
+        return "BLOB"
+    if any(t in declaredType for t in ["REAL", "FLOA", "DOUB"]):
+        return "DOUBLE"
+    # Dates and other NUMERIC columns contain text.
+    return "VARCHAR"
+
+
+def copy_table(source, target, sqliteFile, table):
+    columns = [
+        (row[1], row[2]) for row in source.execute(f"PRAGMA table_info({table})")
+    ]
+    types = [duckdb_type(t) for _, t in columns]
+    # With `sqlite_all_varchar`, the extension reads every value as text,
+    # independent of the declared type (e.g., the dates).  Blobs must not
+    # be read as text, but the tables with blobs have no dates.
+    allVarchar = "BLOB" not in types
+    target.execute(f"SET sqlite_all_varchar={str(allVarchar).lower()}")
+    if allVarchar:
+        expressions = []
+        for (c, _), t in zip(columns, types):
+            if t == "BOOLEAN":
+                # SQLite stores booleans as 0 and 1.
+                expressions.append(f'CAST(CAST("{c}" AS TINYINT) AS BOOLEAN) AS "{c}"')
+            else:
+                expressions.append(f'CAST("{c}" AS {t}) AS "{c}"')
+    else:
+        expressions = [f'"{c}"' for c, _ in columns]
+    path = str(sqliteFile).replace("'", "''")
+    target.execute(
+        f"""
+        CREATE TABLE "{table}" AS
+        SELECT {", ".join(expressions)} FROM sqlite_scan('{path}', '{table}')
+        """
+    )
+
+
+parser = argparse.ArgumentParser(
+    prog="export_duckdb.py",
+    description="Writes a DuckDB companion file of a database file.  Needs "
+    "the duckdb package.",
+)
+parser.add_argument("DB_FILE", type=Path)
+parser.add_argument(
+    "OUT_FILE",
+    type=Path,
+    nargs="?",
+    help="DuckDB file (default: DB_FILE with the suffix .duckdb)",
+)
+args = parser.parse_args()
+outFile = args.OUT_FILE or args.DB_FILE.with_suffix(".duckdb")
+if os.path.exists(outFile):
+    os.remove(outFile)
+
+source = sqlite3.connect(args.DB_FILE)
+target = duckdb.connect(str(outFile))
+target.execute("INSTALL sqlite")
+target.execute("LOAD sqlite")
+
+tables = []
+views = []
+for name, type, sql in source.execute(
+    """
+    SELECT name, type, sql FROM sqlite_schema
+    WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'
+    ORDER BY rowid
+    """
+):
+    if type == "table":
+        tables.append(name)
+    else:
+        views.append((name, sql))
+
+for table in tables:
+    print(f"Copying {table}")
+    copy_table(source, target, args.DB_FILE, table)
+for name, sql in views:
+    print(f"Creating view {name}")
+    target.execute(sql)
+
+target.execute("CHECKPOINT")
+target.close()
+source.close()
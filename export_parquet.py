@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+"""
+Exports the results, joined with the queries, benchmarks, evaluations, and
+solvers, to Parquet files.
+
+The files are partitioned by logic and by the year of the evaluation, in
+the Hive layout:
+
+    OUT_DIR/results/logic=QF_BV/year=2024/part-0.parquet
+
+The partition columns are not stored in the files.  Within a partition the
+rows are ordered by query, and every row group has min/max statistics,
+hence readers can skip row groups.  The benchmark metadata of all queries
+(also those without results) is written to `OUT_DIR/queries`, partitioned
+by logic.  For example, with polars:
+
+    pl.scan_parquet("OUT_DIR/results", hive_partitioning=True)
+      .filter(pl.col("logic") == "QF_BV", pl.col("year") >= 2020)
+
+only reads the files of QF_BV from 2020 on.  DuckDB and Spark read the same
+layout (`read_parquet('OUT_DIR/results/*/*/*.parquet', hive_partitioning =
+true)`).
+"""
+
+import shutil
+import sqlite3
+import argparse
+import polars as pl
+from pathlib import Path
+from modules import statuses
+
+# Partition value of a missing year, as used by Hive.
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+status_type = pl.Enum(list(statuses.names.values()))
+
+results_query = """
+    SELECT lo.logic, strftime('%Y', ev.date) AS year,
+           res.query, query.idx, query.benchmark, bench.name AS benchmark_name,
+           fam.folderName AS family, bench.isIncremental, bench.category,
+           ev.id AS evaluation, ev.name AS evaluation_name, ev.date,
+           sol.name AS solver, sovar.fullName AS solver_variant,
+           res.status, res.cpuTime, res.wallclockTime,
+           query.status AS query_status, query.inferredStatus AS inferred_status
+    FROM Results AS res
+    INNER JOIN Queries AS query ON res.query = query.id
+    INNER JOIN Benchmarks AS bench ON bench.id = query.benchmark
+    INNER JOIN Logics AS lo ON lo.id = bench.logic
+    LEFT JOIN Families AS fam ON fam.id = bench.family
+    INNER JOIN Evaluations AS ev ON res.evaluation = ev.id
+    INNER JOIN SolverVariants AS sovar ON res.solverVariant = sovar.id
+    INNER JOIN Solvers AS sol ON sovar.solver = sol.id
+    ORDER BY lo.logic, year, res.query, ev.id, sovar.id
+"""
+
+results_schema = {
+    "logic": pl.String,
+    "year": pl.String,
+    "query": pl.Int64,
+    "idx": pl.Int32,
+    "benchmark": pl.Int64,
+    "benchmark_name": pl.String,
+    "family": pl.String,
+    "isIncremental": pl.Boolean,
+    "category": pl.Categorical,
+    "evaluation": pl.Int32,
+    "evaluation_name": pl.Categorical,
+    "date": pl.String,
+    "solver": pl.Categorical,
+    "solver_variant": pl.Categorical,
+    "status": pl.UInt8,
+    "cpuTime": pl.Float64,
+    "wallclockTime": pl.Float64,
+    "query_status": pl.UInt8,
+    "inferred_status": pl.UInt8,
+}
+
+queries_query = """
+    SELECT lo.logic, query.id AS query, query.idx, query.benchmark,
+           bench.name AS benchmark_name, fam.folderName AS family,
+           bench.isIncremental, bench.category, bench.size,
+           bench.generatedOn, bench.generatedBy, bench.application,
+           query.normalizedSize, query.assertsCount, query.maxTermDepth,
+           query.status, query.inferredStatus AS inferred_status
+    FROM Queries AS query
+    INNER JOIN Benchmarks AS bench ON bench.id = query.benchmark
+    INNER JOIN Logics AS lo ON lo.id = bench.logic
+    LEFT JOIN Families AS fam ON fam.id = bench.family
+    ORDER BY lo.logic, query.id
+"""
+
+queries_schema = {
+    "logic": pl.String,
+    "query": pl.Int64,
+    "idx": pl.Int32,
+    "benchmark": pl.Int64,
+    "benchmark_name": pl.String,
+    "family": pl.String,
+    "isIncremental": pl.Boolean,
+    "category": pl.Categorical,
+    "size": pl.Int64,
+    "generatedOn": pl.String,
+    "generatedBy": pl.String,
+    "application": pl.String,
+    "normalizedSize": pl.Int64,
+    "assertsCount": pl.Int64,
+    "maxTermDepth": pl.Int64,
+    "status": pl.UInt8,
+    "inferred_status": pl.UInt8,
+}
+
+
+def status_names(df, columns):
+    return df.with_columns(
+        pl.col(c).replace_strict(statuses.names, return_dtype=status_type)
+        for c in columns
+    )
+
+
+def write_partitions(connection, query, schema, folder, keys, args):
+    """
+    Runs `query`, whose result must be ordered by the partition columns
+    `keys`, and writes one Parquet file per partition to `folder`.  Only one
+    partition is kept in memory at a time.  Returns the number of rows and
+    of partitions.
+    """
+    if folder.exists():
+        shutil.rmtree(folder)
+    statusColumns = [c for c, t in schema.items() if t == pl.UInt8]
+    rows = 0
+    partitions = 0
+    current = None
+    frames = []
+
+    def flush():
+        nonlocal partitions
+        if not frames:
+            return
+        df = status_names(pl.concat(frames), statusColumns).drop(keys)
+        path = folder
+        for key, value in zip(keys, current):
+            path = path / f"{key}={NULL_PARTITION if value == None else value}"
+        path.mkdir(parents=True)
+        df.write_parquet(
+            path / "part-0.parquet",
+            statistics=True,
+            row_group_size=args.row_group_size,
+        )
+        partitions = partitions + 1
+
+    cursor = connection.execute(query)
+    while True:
+        batch = cursor.fetchmany(args.batch_size)
+        if not batch:
+            break
+        df = pl.DataFrame(batch, schema=schema, orient="row")
+        rows = rows + len(df)
+        for key, part in df.partition_by(
+            keys, as_dict=True, maintain_order=True
+        ).items():
+            if key != current:
+                flush()
+                current = key
+                frames = []
+            frames.append(part)
+    flush()
+    return rows, partitions
+
+
+parser = argparse.ArgumentParser(
+    prog="export_parquet.py",
+    description="Exports the results and the benchmark metadata to Parquet.",
+)
+parser.add_argument("DB_FILE", type=Path)
+parser.add_argument("OUT_DIR", type=Path)
+parser.add_argument(
+    "--row-group-size",
+    type=int,
+    default=100000,
+    help="maximal number of rows per row group",
+)
+parser.add_argument(
+    "--batch-size",
+    type=int,
+    default=100000,
+    help="number of rows read from the database at a time",
+)
+args = parser.parse_args()
+
+connection = sqlite3.connect(args.DB_FILE)
+rows, partitions = write_partitions(
+    connection,
+    results_query,
+    results_schema,
+    args.OUT_DIR / "results",
+    ["logic", "year"],
+    args,
+)
+print(f"Wrote {rows} results in {partitions} partitions.")
+rows, partitions = write_partitions(
+    connection,
+    queries_query,
+    queries_schema,
+    args.OUT_DIR / "queries",
+    ["logic"],
+    args,
+)
+print(f"Wrote {rows} queries in {partitions} partitions.")
+connection.close()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+"""
+Writes the read-optimized release variant of a finished database file.
+
+The input is the compact file left by `postprocess.py`.  The output has
+covering indexes for the queries of the webapp, the static pages, and the
+studies, statistics for the query planner (`ANALYZE`), a larger page size,
+and a rollback journal.  It is meant to be opened read-only and immutable
+(see `database.connect_read`).  Afterwards, the sizes of both files and the
+latency of some typical queries are compared.
+
+With `--cluster-results`, the results are stored clustered by query, with
+the times in integer milliseconds (see `database.cluster_results`).
+"""
+
+import os
+import time
+import argparse
+import statistics
+from pathlib import Path
+from modules import database
+
+# Typical queries of the webapp and the static pages.  The parameters are
+# taken from the database by the `sample` queries.
+report_queries = [
+    (
+        "queries of a benchmark",
+        "SELECT id FROM Benchmarks ORDER BY id LIMIT 1 OFFSET ?",
+        """
+        SELECT id, idx, status, inferredStatus FROM Queries
+        WHERE benchmark=? ORDER BY idx
+        """,
+    ),
+    (
+        "results of a query",
+        "SELECT id FROM Queries ORDER BY id LIMIT 1 OFFSET ?",
+        """
+        SELECT ev.name, ev.date, sol.name, sovar.fullName, st.name,
+               res.cpuTime, res.wallclockTime
+        FROM Results AS res
+        INNER JOIN Evaluations AS ev ON ev.id = res.evaluation
+        INNER JOIN SolverVariants AS sovar ON sovar.id = res.solverVariant
+        INNER JOIN Solvers AS sol ON sol.id = sovar.solver
+        INNER JOIN Statuses AS st ON st.id = res.status
+        WHERE res.query=?
+        ORDER BY ev.date
+        """,
+    ),
+    (
+        "ratings of a query",
+        "SELECT id FROM Queries ORDER BY id LIMIT 1 OFFSET ?",
+        """
+        SELECT ev.name, rat.rating, rat.consideredSolvers, rat.successfulSolvers
+        FROM Ratings AS rat
+        INNER JOIN Evaluations AS ev ON ev.id = rat.evaluation
+        WHERE rat.query=?
+        """,
+    ),
+    (
+        "benchmarks of a family",
+        "SELECT id FROM Families ORDER BY id LIMIT 1 OFFSET ?",
+        """
+        SELECT bench.id, bench.name, lo.logic FROM Benchmarks AS bench
+        INNER JOIN Logics AS lo ON lo.id = bench.logic
+        WHERE bench.family=? ORDER BY bench.name
+        """,
+    ),
+    (
+        "solved queries of a logic",
+        "SELECT id FROM Logics ORDER BY id LIMIT 1 OFFSET ?",
+        """
+        SELECT ev.id, COUNT(DISTINCT res.query) FROM Benchmarks AS bench
+        INNER JOIN Queries AS query ON query.benchmark = bench.id
+        INNER JOIN Results AS res ON res.query = query.id
+        INNER JOIN Evaluations AS ev ON ev.id = res.evaluation
+        WHERE bench.logic=? AND res.status IN (1, 2) -- sat or unsat
+        GROUP BY ev.id
+        """,
+    ),
+]
+
+
+def sample_parameters(connection, sample, count):
+    """
+    Returns up to `count` parameters spread evenly over the rows returned
+    by `sample`.
+    """
+    table = sample.split("FROM ")[1].split(" ")[0]
+    total = connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    parameters = []
+    for i in range(min(count, total)):
+        for row in connection.execute(sample, (i * total // count,)):
+            parameters.append(row[0])
+    return parameters
+
+
+def median_latency(connection, query, parameters):
+    """
+    Returns the median time in milliseconds to run `query` with each
+    parameter.
+    """
+    times = []
+    for parameter in parameters:
+        start = time.perf_counter()
+        connection.execute(query, (parameter,)).fetchall()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def print_report(dbFile, outFile, count):
+    files = [("compact", dbFile), ("read-optimized", outFile)]
+    connections = [database.connect_read(f) for _, f in files]
+    print(f"{'':28}{'compact':>16}{'read-optimized':>16}")
+    sizes = [f"{os.path.getsize(f) / 1e6:.1f} MB" for _, f in files]
+    print(f"{'file size':28}{sizes[0]:>16}{sizes[1]:>16}")
+    for pragma in ["page_size", "page_count"]:
+        values = [c.execute(f"PRAGMA {pragma}").fetchone()[0] for c in connections]
+        print(f"{pragma:28}{values[0]:>16}{values[1]:>16}")
+    print(f"Median latency of {count} runs:")
+    for name, sample, query in report_queries:
+        parameters = sample_parameters(connections[1], sample, count)
+        if not parameters:
+            continue
+        latencies = [
+            f"{median_latency(c, query, parameters):.2f} ms" for c in connections
+        ]
+        print(f"  {name:26}{latencies[0]:>16}{latencies[1]:>16}")
+    for connection in connections:
+        connection.close()
+
+
+parser = argparse.ArgumentParser(
+    prog="finalize.py",
+    description="Writes the read-optimized release variant of a database file.",
+)
+parser.add_argument("DB_FILE", type=Path, help="compact database")
+parser.add_argument("OUT_FILE", type=Path, help="read-optimized output database")
+parser.add_argument(
+    "--page-size",
+    type=int,
+    default=database.READ_PAGE_SIZE,
+    help="page size of the output file (a power of two from 512 to 65536)",
+)
+parser.add_argument(
+    "--cluster-results",
+    action="store_true",
+    help="store the results clustered by query, with times in milliseconds",
+)
+parser.add_argument(
+    "--runs",
+    type=int,
+    default=20,
+    help="number of runs of each query in the latency report",
+)
+parser.add_argument(
+    "--no-report",
+    action="store_true",
+    help="do not compare the sizes and latencies of the two files",
+)
+args = parser.parse_args()
+
+if args.page_size not in [2**i for i in range(9, 17)]:
+    parser.error("The page size must be a power of two from 512 to 65536.")
+if args.OUT_FILE.resolve() == args.DB_FILE.resolve():
+    parser.error("The output file must differ from the input file.")
+
+database.finalize(args.DB_FILE, args.OUT_FILE, args.page_size, args.cluster_results)
+if not args.no_report:
+    print_report(args.DB_FILE, args.OUT_FILE, args.runs)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+"""
+Summarizes the statistics log written by `bulkadd.py --stats`.
+
+Reports the throughput of the run, the time spent in each stage, and the
+slowest files and families.  The time a file spent between the end of its
+analysis and the start of its write is reported as "queue".  If this time
+is large, the writer is the bottleneck.
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+STAGES = [
+    "hash",
+    "klhm",
+    "dolmenLax",
+    "dolmenStrict",
+    "analysis",
+    "queue",
+    "write",
+]
+
+
+def read_log(statsFile):
+    entries = []
+    with open(statsFile) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    return entries
+
+
+def print_table(header, rows):
+    widths = [
+        max(len(str(row[i])) for row in [header] + rows) for i in range(len(header))
+    ]
+    for row in [header] + rows:
+        print("  ".join(str(x).rjust(w) for x, w in zip(row, widths)))
+    print()
+
+
+parser = argparse.ArgumentParser(
+    prog="ingeststats.py",
+    description="Summarizes the statistics log of bulkadd.py.",
+)
+parser.add_argument("STATS_FILE", type=Path)
+parser.add_argument(
+    "-n",
+    "--top",
+    type=int,
+    default=10,
+    help="number of slowest files and families to list",
+)
+args = parser.parse_args()
+
+entries = read_log(args.STATS_FILE)
+files = [e for e in entries if e["action"] in ["add", "copy", "touch"]]
+added = [e for e in files if e["action"] == "add"]
+copied = [e for e in files if e["action"] == "copy"]
+commits = [e for e in entries if e["action"] == "commit"]
+removed = [e for e in entries if e["action"] == "remove"]
+if not files:
+    print("No files in the log.")
+    sys.exit(0)
+
+for e in files:
+    analysisEnd = e["start"] + e.get("analysis", e["hash"])
+    e["queue"] = max(0.0, e["time"] - e["write"] - analysisEnd)
+
+elapsed = max(e["time"] for e in entries) - min(e["start"] for e in files)
+totalBytes = sum(e["bytes"] for e in files)
+totalQueries = sum(e["queries"] for e in added)
+unchanged = len(files) - len(added) - len(copied)
+print(f"Files: {len(added)} analyzed, {len(copied)} duplicates, {unchanged} unchanged")
+print(f"Removed: {len(removed)}")
+print(f"Queries: {totalQueries}")
+print(f"Elapsed: {elapsed:.1f}s")
+if elapsed > 0:
+    print(
+        f"Throughput: {len(files) / elapsed:.1f} files/s, "
+        f"{totalBytes / elapsed / 1e6:.2f} MB/s, "
+        f"{totalQueries / elapsed:.1f} queries/s"
+    )
+if commits:
+    commitTime = sum(e["commit"] for e in commits)
+    print(f"Commits: {len(commits)}, {commitTime:.1f}s in total")
+print()
+
+rows = []
+for stage in STAGES:
+    durations = [e[stage] for e in files if stage in e]
+    if durations:
+        rows.append(
+            [
+                stage,
+                len(durations),
+                f"{sum(durations):.1f}",
+                f"{sum(durations) / len(durations):.3f}",
+                f"{max(durations):.3f}",
+            ]
+        )
+print("Time per stage (seconds):")
+print_table(["stage", "files", "total", "mean", "max"], rows)
+
+
+def total_time(e):
+    return e.get("analysis", e["hash"]) + e["write"]
+
+
+slowest = sorted(added, key=total_time, reverse=True)[: args.top]
+rows = []
+for e in slowest:
+    row = [e["key"], e["bytes"], e["queries"]]
+    for stage in ["klhm", "dolmenLax", "dolmenStrict"]:
+        row.append(f"{e.get(stage, 0.0):.2f}")
+    row.append(f"{total_time(e):.2f}")
+    rows.append(row)
+print("Slowest files (seconds):")
+print_table(["file", "bytes", "queries", "klhm", "lax", "strict", "total"], rows)
+
+families = {}
+for e in added:
+    # The key is "track/logic/family/file".
+    family = "/".join(e["key"].split("/")[1:3])
+    count, time, size = families.get(family, (0, 0.0, 0))
+    families[family] = (count + 1, time + total_time(e), size + e["bytes"])
+slowest = sorted(families.items(), key=lambda x: x[1][1], reverse=True)[: args.top]
+rows = []
+for family, (count, time, size) in slowest:
+    rows.append([family, count, size, f"{time:.1f}", f"{time / count:.2f}"])
+print("Slowest families (seconds):")
+print_table(["family", "files", "bytes", "total", "mean"], rows)
@@ -183,15 +183,26 @@ fn print_subproblem(
     try out.print("{s}\n", .{command});
 }
 
-pub fn main() !u8 {
-    var area = std.heap.ArenaAllocator.init(std.heap.page_allocator);
-    defer area.deinit();
-    const allocator = area.allocator();
+const Format = enum {
+    // A single JSON list.  One object per query, followed by the object
+    // with the benchmark data.
+    list,
+    // One JSON object per line.  Each line carries the path of the file:
+    // `{"path":...,"query":{...}}` for every query, followed by
+    // `{"path":...,"benchmark":{...}}` as trailer.  If the file cannot be
+    // read, `{"path":...,"error":"..."}` is printed instead of the trailer.
+    ndjson,
+};
+
+fn print_ndjson_key(out: anytype, filename: []const u8, key: []const u8) !void {
+    _ = try out.write("{\"path\":");
+    try std.json.stringify(filename, .{}, out);
+    try out.print(",\"{s}\":", .{key});
+}
 
+pub fn main() !u8 {
     const stdout_file = std.io.getStdOut().writer();
     var bw = std.io.bufferedWriter(stdout_file);
-    const stdout = bw.writer();
-    _ = try stdout.write("[\n");
 
     if (.windows == @import("builtin").os.tag) {
         print("Windows is not supported.\n", .{});
@@ -202,10 +213,72 @@ pub fn main() !u8 {
         print("Klammerhammer -- Extract SMT-LIB metadata\n\n", .{});
         print("Usage:\n", .{});
         print("\tklhm FILENAME\n", .{});
+        print("\tklhm --batch [FILELIST]\n", .{});
         return 1;
     }
 
-    const filename = std.mem.span(std.os.argv[1]);
+    const arg = std.mem.span(std.os.argv[1]);
+    if (std.mem.eql(u8, arg, "--batch")) {
+        try run_batch(&bw);
+        return 0;
+    }
+
+    var area = std.heap.ArenaAllocator.init(std.heap.page_allocator);
+    defer area.deinit();
+    try analyze_file(area.allocator(), arg, &bw, .list);
+    return 0;
+}
+
+// Analyzes every file listed in FILELIST, or in stdin if no list is given.
+// One path per line.  A file that cannot be analyzed is reported by an
+// error line and does not stop the batch.
+fn run_batch(bw: anytype) !void {
+    const out = bw.writer();
+    const input = if (std.os.argv.len > 2)
+        try fs.cwd().openFile(std.mem.span(std.os.argv[2]), .{})
+    else
+        std.io.getStdIn();
+    defer input.close();
+
+    var br = std.io.bufferedReader(input.reader());
+    const in = br.reader();
+
+    var line = std.ArrayList(u8).init(std.heap.page_allocator);
+    defer line.deinit();
+
+    var eof = false;
+    while (!eof) {
+        line.clearRetainingCapacity();
+        in.streamUntilDelimiter(line.writer(), '\n', null) catch |err| {
+            if (err != error.EndOfStream) return err;
+            eof = true;
+        };
+        const filename = std.mem.trim(u8, line.items, " \t\r");
+        if (filename.len == 0) continue;
+
+        // A fresh arena for every file keeps the memory use of long
+        // batches flat.
+        var area = std.heap.ArenaAllocator.init(std.heap.page_allocator);
+        defer area.deinit();
+        analyze_file(area.allocator(), filename, bw, .ndjson) catch |err| {
+            try print_ndjson_key(out, filename, "error");
+            try std.json.stringify(@errorName(err), .{}, out);
+            _ = try out.write("}\n");
+            try bw.flush();
+        };
+    }
+}
+
+fn analyze_file(
+    allocator: std.mem.Allocator,
+    filename: []const u8,
+    bw: anytype,
+    format: Format,
+) !void {
+    const stdout = bw.writer();
+    if (format == .list)
+        _ = try stdout.write("[\n");
+
     const file = try fs.cwd().openFile(filename, .{});
     defer file.close();
 
@@ -440,9 +513,18 @@ pub fn main() !u8 {
                             ptr[level_start_idx..idx],
                         );
 
-                        try top.data.print(stdout);
-                        // try print_subproblem(stdout, ptr, &scopes, ptr[level_start_idx..idx]);
-                        _ = try stdout.write(",\n");
+                        switch (format) {
+                            .list => {
+                                try top.data.print(stdout);
+                                // try print_subproblem(stdout, ptr, &scopes, ptr[level_start_idx..idx]);
+                                _ = try stdout.write(",\n");
+                            },
+                            .ndjson => {
+                                try print_ndjson_key(stdout, filename, "query");
+                                try top.data.print(stdout);
+                                _ = try stdout.write("}\n");
+                            },
+                        }
                         try bw.flush();
 
                         try top.intervals.append(idx);
@@ -468,8 +550,16 @@ pub fn main() !u8 {
 
     benchmarkData.isIncremental = benchmarkData.queryCount > 1;
     benchmarkData.compressedSize = try zstd.compressedSizeSlice(ptr);
-    try benchmarkData.print(stdout);
-    _ = try stdout.write("\n]\n");
+    switch (format) {
+        .list => {
+            try benchmarkData.print(stdout);
+            _ = try stdout.write("\n]\n");
+        },
+        .ndjson => {
+            try print_ndjson_key(stdout, filename, "benchmark");
+            try benchmarkData.print(stdout);
+            _ = try stdout.write("}\n");
+        },
+    }
     try bw.flush();
-    return 0;
 }
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+"""
+Writes the delta between two releases of the database (see
+`modules/delta.py`).  The delta is an SQLite file, which `apply_delta.py`
+applies to the old release.
+"""
+
+import os
+import sqlite3
+import argparse
+from pathlib import Path
+from modules import delta
+
+parser = argparse.ArgumentParser(
+    prog="make_delta.py",
+    description="Writes the delta between two releases of the database.",
+)
+parser.add_argument("OLD_DB_FILE", type=Path)
+parser.add_argument("NEW_DB_FILE", type=Path)
+parser.add_argument("DELTA_FILE", type=Path)
+args = parser.parse_args()
+
+if os.path.exists(args.DELTA_FILE):
+    os.remove(args.DELTA_FILE)
+# URIs are needed to attach the releases as immutable.
+connection = sqlite3.connect(args.DELTA_FILE.resolve().as_uri(), uri=True)
+for schema, dbFile in [("old", args.OLD_DB_FILE), ("new", args.NEW_DB_FILE)]:
+    # Both releases are only read.
+    uri = dbFile.resolve().as_uri() + "?immutable=1"
+    connection.execute("ATTACH DATABASE ? AS " + schema, (uri,))
+
+changes = delta.make_delta(connection)
+for table, (changed, deleted) in changes.items():
+    print(f"{table}: {changed} new or changed, {deleted} deleted")
+connection.execute("DETACH DATABASE old")
+connection.execute("DETACH DATABASE new")
+connection.execute("VACUUM")
+connection.close()
+print(f"Delta size: {os.path.getsize(args.DELTA_FILE) / 1e6:.1f} MB")
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+
+"""
+Merges the database files of a sharded build (see `bulkadd.py --shard`).
+
+The output file is created by `prepopulate.py` first.  Afterwards,
+`postprocess.py` is run on the merged file as usual.
+"""
+
+import argparse
+from pathlib import Path
+from modules import database, shards
+
+parser = argparse.ArgumentParser(
+    prog="merge_shards.py",
+    description="Merges the database files of a sharded build.",
+)
+
+parser.add_argument("DB_FILE", type=Path, help="prepopulated output database")
+parser.add_argument("SHARD_FILES", type=Path, nargs="+")
+args = parser.parse_args()
+
+connection = database.connect_bulk(args.DB_FILE)
+for shardFile in args.SHARD_FILES:
+    print(f"Merging {shardFile}")
+    shards.merge_shard(connection, shardFile)
+connection.close()
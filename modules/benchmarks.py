@@ -1,11 +1,20 @@
+import os
 import re
+import time
+import pickle
+import tempfile
 import datetime
 import subprocess
+import asyncio
 import mmap
 import json
-import sqlite3
 
 import modules.solvers
+from modules import dolmen, executor, logics, statuses, symbolvectors
+
+KLHM_BIN = "./klhm/zig-out/bin/klhm"
+# Maximal length of an output line of `klhm --batch`.
+KLHM_LINE_LIMIT = 16 * 1024 * 1024
 
 
 def setup_benchmarks(connection):
@@ -14,7 +23,7 @@ def setup_benchmarks(connection):
         id INTEGER PRIMARY KEY,
         name TEXT NOT NULL,
         family INT,
-        logic NVARCHAR(100) NOT NULL,
+        logic INT NOT NULL,
         isIncremental BOOL,
         size INT,
         compressedSize INT,
@@ -29,9 +38,10 @@ def setup_benchmarks(connection):
         passesDolmen BOOL,
         passesDolmenStrict BOOL,
         queryCount INT NOT NULL,
+        contentHash TEXT,
         FOREIGN KEY(family) REFERENCES Families(id)
         FOREIGN KEY(license) REFERENCES Licenses(id)
-        FOREIGN KEY(logic) REFERENCES Logics(logic)
+        FOREIGN KEY(logic) REFERENCES Logics(id)
     );"""
     )
 
@@ -52,9 +62,12 @@ def setup_benchmarks(connection):
         defineSortCount INT,
         declareDatatypeCount INT,
         maxTermDepth INT,
-        status TEXT,
-        inferredStatus TEXT,
+        status INT,
+        inferredStatus INT,
+        symbolFrequency BLOB,
         FOREIGN KEY(benchmark) REFERENCES Benchmarks(id)
+        FOREIGN KEY(status) REFERENCES Statuses(id)
+        FOREIGN KEY(inferredStatus) REFERENCES Statuses(id)
     );"""
     )
 
@@ -87,16 +100,6 @@ def setup_benchmarks(connection):
         name TEXT);"""
     )
 
-    connection.execute(
-        """CREATE TABLE SymbolCounts(
-        symbol INT,
-        query INT,
-        count INT NOT NULL,
-        FOREIGN KEY(symbol) REFERENCES Symbols(id)
-        FOREIGN KEY(query) REFERENCES Queries (id)
-    );"""
-    )
-
     with open("./klhm/src/smtlib-symbols", "r") as symbolFile:
         count = 1
         for line in symbolFile:
@@ -159,12 +162,13 @@ def get_license_id(connection, license):
     raise Exception("Could not determine license.")
 
 
-def add_benchmark(dbFile, benchmark, dolmenPath):
+def parse_benchmark_path(benchmark):
     """
-    Populates the database with the filenames of the benchmarks.
-    Does not populate metadata fields or anything else.
+    Splits the path of a benchmark into its components.  The path must
+    contain exactly one 'incremental' or 'non-incremental' folder, which
+    is followed by the logic, the family folder, and the file name.
+    Returns the tuple (isIncremental, logic, familyFolder, fileName).
     """
-    print(f"Adding {benchmark}")
     parts = benchmark.parts
 
     incrementalCount = parts.count("incremental")
@@ -184,83 +188,398 @@ def add_benchmark(dbFile, benchmark, dolmenPath):
 
     logic = parts[1]
     familyFolder = parts[2]
-    date, familyName = parse_family(familyFolder)
     fileName = "/".join(parts[3:])
+    return isIncremental, logic, familyFolder, fileName
 
-    klhm = subprocess.run(
-        f"./klhm/zig-out/bin/klhm {benchmark}",
-        shell=True,
-        check=True,
-        stdout=subprocess.PIPE,
-        text=True,
-    )
 
-    klhmData = json.loads(klhm.stdout)
-    queryObjs = klhmData[0:-1]
-    benchmarkObj = klhmData[-1]
+def parse_klhm_line(line):
+    """
+    Parses one line of the output of `klhm --batch`.  Returns a tuple
+    (path, kind, obj), where kind is either "query", "benchmark", or
+    "error".
+    """
+    obj = json.loads(line)
+    path = obj.pop("path")
+    kind, value = obj.popitem()
+    return path, kind, value
+
+
+class KlhmError(Exception):
+    pass
+
+
+# Fields of a query object reported by klhm, in the order of the columns of
+# the Queries table.  The status is the last field, it is stored as code (see
+# `modules/statuses.py`).
+query_fields = [
+    "normalizedSize",
+    "compressedSize",
+    "assertsCount",
+    "declareFunCount",
+    "declareConstCount",
+    "declareSortCount",
+    "defineFunCount",
+    "defineFunRecCount",
+    "constantFunCount",
+    "defineSortCount",
+    "declareDatatypeCount",
+    "maxTermDepth",
+    "status",
+]
+
+# Number of queries per chunk of a `QuerySpool`.
+QUERY_CHUNK_SIZE = 1000
+
+
+class QuerySpool:
+    """
+    Holds the queries of a benchmark in compact form: a tuple of the values
+    of `query_fields`, followed by the packed symbol frequency vector (see
+    `modules/symbolvectors.py`).  Once more than `QUERY_CHUNK_SIZE` queries are
+    added, they are written to a temporary file in chunks, such that memory
+    use does not grow with the number of queries.  A spool can be pickled
+    and passed to another process.  Call `discard` once it is not needed
+    anymore to remove the temporary file.
+    """
 
-    generatedOn = None
+    def __init__(self):
+        self.count = 0
+        self.chunk = []
+        self.path = None
+
+    def __len__(self):
+        return self.count
+
+    def add(self, queryObj):
+        query = tuple(queryObj[field] for field in query_fields[0:-1]) + (
+            statuses.status_code(queryObj["status"]),
+        )
+        symbols = symbolvectors.pack(queryObj["symbolFrequency"])
+        self.chunk.append(query + (symbols,))
+        self.count = self.count + 1
+        if len(self.chunk) >= QUERY_CHUNK_SIZE:
+            self.spill()
+
+    def spill(self):
+        if not self.path:
+            fd, self.path = tempfile.mkstemp(prefix="queries-", suffix=".pickle")
+            os.close(fd)
+        with open(self.path, "ab") as f:
+            pickle.dump(self.chunk, f)
+        self.chunk = []
+
+    def chunks(self):
+        """
+        Yields the queries in order, as lists of at most `QUERY_CHUNK_SIZE`
+        queries.
+        """
+        if self.path:
+            with open(self.path, "rb") as f:
+                while True:
+                    try:
+                        yield pickle.load(f)
+                    except EOFError:
+                        break
+        if self.chunk:
+            yield self.chunk
+
+    def discard(self):
+        if self.path:
+            os.remove(self.path)
+            self.path = None
+        self.chunk = []
+
+
+class KlhmProcess:
+    """
+    A long running `klhm --batch` process.  Benchmarks are passed to it one
+    after the other, so there is no need to start a new process per file.
+    The process is (re)started on demand, and killed if it exceeds the time
+    limit of klhm for a single benchmark.
+    """
+
+    def __init__(self, toolExecutor):
+        self.executor = toolExecutor
+        self.process = None
+
+    async def analyze(self, benchmark):
+        """
+        Returns a `QuerySpool` with the queries and the benchmark object that
+        klhm reports for the benchmark file.  The queries are added to the
+        spool while klhm runs.
+        """
+        if not self.process or self.process.returncode != None:
+            self.process = await self.executor.start(
+                "klhm",
+                [KLHM_BIN, "--batch"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                limit=KLHM_LINE_LIMIT,
+            )
+        path = str(benchmark)
+        timeout = self.executor.get_limits("klhm")["timeout"]
+        try:
+            self.process.stdin.write((path + "\n").encode())
+            await self.process.stdin.drain()
+            return await asyncio.wait_for(self.read_benchmark(path), timeout)
+        except KlhmError:
+            raise
+        except asyncio.TimeoutError:
+            await self.stop()
+            raise executor.ToolTimeout(
+                f"klhm exceeded its time limit of {timeout} seconds."
+            )
+        except BaseException:
+            await self.stop()
+            raise
+
+    async def read_benchmark(self, path):
+        querySpool = QuerySpool()
+        try:
+            return await self.read_queries(path, querySpool)
+        except BaseException:
+            querySpool.discard()
+            raise
+
+    async def read_queries(self, path, querySpool):
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                raise Exception(f"klhm terminated while analyzing {path}.")
+            eventPath, kind, obj = parse_klhm_line(line)
+            if eventPath != path:
+                raise Exception(f"Unexpected klhm output for {eventPath}.")
+            if kind == "query":
+                querySpool.add(obj)
+            elif kind == "benchmark":
+                return querySpool, obj
+            else:
+                raise KlhmError(f"klhm failed on {path}: {obj}")
+
+    async def stop(self):
+        if self.process:
+            if self.process.returncode == None:
+                self.process.kill()
+            await self.process.wait()
+            self.process = None
+
+    async def close(self):
+        if self.process:
+            self.process.stdin.close()
+            await self.process.wait()
+            self.process = None
+
+
+async def cancel_on_error(*tasks):
+    """
+    Waits for all tasks.  If one fails, the remaining ones are cancelled,
+    such that no tool keeps running in the background.
+    """
+    tasks = [asyncio.ensure_future(t) for t in tasks]
     try:
-        generatedOn = datetime.datetime.fromisoformat(benchmarkObj["generatedOn"])
-    except (ValueError, TypeError):
-        pass
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
 
-    dolmen = subprocess.call(
-        f"{dolmenPath} -s 4G --strict=false {benchmark}",
-        shell=True,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    )
-    if dolmen == 2 or dolmen == 125:
-        dolmen = None
-    elif dolmen == 0:
-        dolmen = True
-    else:
-        dolmen = False
 
-    dolmenStrict = subprocess.call(
-        f"{dolmenPath} -s 4G --strict=true {benchmark}",
-        shell=True,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    )
-    if dolmenStrict == 2 or dolmenStrict == 125:
-        dolmenStrict = None
-    elif dolmenStrict == 0:
-        dolmenStrict = True
-    else:
-        dolmenStrict = False
+async def analyze_benchmark(
+    benchmark, dolmenPath, toolExecutor, klhm=None, dolmenResults=None, source=None
+):
+    """
+    Runs the external analysis tools (klhm and Dolmen) on a benchmark file.
+    The tools run concurrently through `toolExecutor`.  This function does
+    not access the database, such that it can be called from worker
+    processes.  The returned dictionary can be passed to `insert_benchmark`.
+    Its "queries" are a `QuerySpool`, which the caller has to discard.
+    If a `KlhmProcess` is given, it is used instead of starting klhm for
+    this benchmark only.  If `dolmenResults` is given (e.g., from a
+    `dolmen.DolmenCache`), Dolmen is not run.  The tools read the file
+    `source` if it is given, and `benchmark` otherwise.  In both cases the
+    family and file name are taken from `benchmark`.  The durations of the
+    tool runs in seconds are returned under "timings".
+    """
+    _, _, familyFolder, fileName = parse_benchmark_path(benchmark)
+    if not source:
+        source = benchmark
+    timings = {}
+    querySpools = []
+
+    async def run_klhm():
+        start = time.monotonic()
+        if klhm:
+            result = await klhm.analyze(source)
+        else:
+            klhmRun = await toolExecutor.run(
+                "klhm",
+                [KLHM_BIN, str(source)],
+                stdout=subprocess.PIPE,
+                check=True,
+            )
+            klhmData = json.loads(klhmRun.stdout)
+            querySpool = QuerySpool()
+            for queryObj in klhmData[0:-1]:
+                querySpool.add(queryObj)
+            result = querySpool, klhmData[-1]
+        querySpools.append(result[0])
+        timings["klhm"] = time.monotonic() - start
+        return result
+
+    async def run_dolmen():
+        if dolmenResults:
+            return dolmenResults
+        return await dolmen.run_dolmen(toolExecutor, source, dolmenPath, timings)
 
-    if dolmenStrict == None or dolmen == None:
+    try:
+        klhmResult, dolmenResult = await cancel_on_error(run_klhm(), run_dolmen())
+    except BaseException:
+        for querySpool in querySpools:
+            querySpool.discard()
+        raise
+    querySpool, benchmarkObj = klhmResult
+    passesDolmen, passesDolmenStrict = dolmenResult
+
+    if passesDolmen == None or passesDolmenStrict == None:
         print("Have none!")
 
-    connection = sqlite3.connect(dbFile, timeout=30.0)
-    # This should not be necessary, because WAL mode is persistent, but we
-    # add it here to be sure.
-    connection.execute("PRAGMA journal_mode=wal")
-    # Disable to-disc syncing, might corrupt database on system crash, but since
-    # this script is used to build the database upfront, this is mostly harmless.
-    connection.execute("PRAGMA synchronous = OFF")
+    return {
+        "path": str(benchmark),
+        "familyFolder": familyFolder,
+        "fileName": fileName,
+        "benchmark": benchmarkObj,
+        "queries": querySpool,
+        "passesDolmen": passesDolmen,
+        "passesDolmenStrict": passesDolmenStrict,
+        "timings": timings,
+    }
 
-    cursor = connection.cursor()
-    familyId = None
-    # short circuit
-    for row in cursor.execute(
-        "SELECT id FROM Families WHERE folderName=?", (familyFolder,)
-    ):
-        familyId = row[0]
 
-    if not familyId:
-        cursor.execute(
+def parse_target_solvers(targetSolvers):
+    """
+    Splits the "Target Solver" header into a list of solver names.
+    """
+    # Hacks for the two space sperated cases
+    if targetSolvers == "Boolector Z3 STP":
+        return ["Boolector", "Z3", "STP"]
+    if targetSolvers == "CVC4 Mathsat SPASS-IQ YICES Z3":
+        return ["CVC4", "Mathsat", "SPASS-IQ", "YICES", "Z3"]
+    # Split on '/', " or ", and ","
+    targetSolvers = targetSolvers.replace("/", ",")
+    targetSolvers = targetSolvers.replace(" or ", ",")
+    targetSolvers = targetSolvers.split(",")
+    return [x.strip() for x in targetSolvers]
+
+
+class IngestContext:
+    """
+    In-memory copies of the small tables that are consulted for every
+    benchmark: Families by folder name, Logics by name, the ids of the
+    License headers, and the solver variant ids of parsed "Target Solver"
+    headers.  Families and logics inserted through the context are
+    added to it.
+    A context must only be used with the connection it was created for,
+    and must be dropped if that connection rolls back.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.families = {}
+        for row in connection.execute("SELECT id, folderName FROM Families"):
+            self.families[row[1]] = row[0]
+        self.licenses = {}
+        self.logics = {}
+        for row in connection.execute("SELECT id, logic FROM Logics"):
+            self.logics[row[1]] = row[0]
+        self.targetSolvers = {}
+
+    def family_id(self, familyFolder):
+        """
+        Returns the id of the family, and inserts it first if necessary.
+        """
+        try:
+            return self.families[familyFolder]
+        except KeyError:
+            pass
+        date, familyName = parse_family(familyFolder)
+        cursor = self.connection.execute(
             """
-            INSERT OR IGNORE INTO Families(name, foldername, date, benchmarkCount)
+            INSERT INTO Families(name, foldername, date, benchmarkCount)
             VALUES(?,?,?,?);
             """,
             (familyName, familyFolder, date, 0),
         )
-        familyId = cursor.lastrowid
+        self.families[familyFolder] = cursor.lastrowid
+        return cursor.lastrowid
 
-    licenseId = get_license_id(connection, benchmarkObj["license"])
+    def logic_id(self, logic):
+        """
+        Returns the id of the logic.  Logics that are not in the list of
+        `logics.write_all_logics` are inserted first.
+        """
+        try:
+            return self.logics[logic]
+        except KeyError:
+            pass
+        logicId = logics.LogicsCollector(logic).writeToDatabase(self.connection)
+        self.logics[logic] = logicId
+        return logicId
+
+    def license_id(self, license):
+        """
+        Returns the id of the license, as `get_license_id` does.
+        """
+        try:
+            return self.licenses[license]
+        except KeyError:
+            pass
+        licenseId = get_license_id(self.connection, license)
+        self.licenses[license] = licenseId
+        return licenseId
+
+    def target_solver_ids(self, targetSolvers):
+        """
+        Returns the solver variant ids of a "Target Solver" header.  Unknown
+        solvers are reported once per distinct header.
+        """
+        try:
+            return self.targetSolvers[targetSolvers]
+        except KeyError:
+            pass
+        ids = []
+        for targetSolver in parse_target_solvers(targetSolvers):
+            try:
+                ids.append(modules.solvers.global_variant_lookup[targetSolver])
+            except KeyError:
+                print(f"WARNING: Target solver '{targetSolver}' not known.")
+        self.targetSolvers[targetSolvers] = ids
+        return ids
+
+
+def insert_benchmark(connection, record, context=None):
+    """
+    Writes a benchmark analyzed by `analyze_benchmark` into the database.
+    Does not commit, this is left to the caller.  Returns the id of the
+    new benchmark.  Lookups go through `context`, an `IngestContext` for
+    `connection`.  If none is given, a temporary one is created.
+    """
+    familyFolder = record["familyFolder"]
+    benchmarkObj = record["benchmark"]
+    querySpool = record["queries"]
+
+    generatedOn = None
+    try:
+        generatedOn = datetime.datetime.fromisoformat(benchmarkObj["generatedOn"])
+    except (ValueError, TypeError):
+        pass
+
+    if not context:
+        context = IngestContext(connection)
+    cursor = connection.cursor()
+    familyId = context.family_id(familyFolder)
+    logicId = context.logic_id(benchmarkObj["logic"])
+    licenseId = context.license_id(benchmarkObj["license"])
     timeLimit = 0.0
     try:
         timeLimit = float(benchmarkObj["timeLimit"])
@@ -285,13 +604,14 @@ def add_benchmark(dbFile, benchmark, dolmenPath):
                                category,
                                passesDolmen,
                                passesDolmenStrict,
-                               queryCount)
-        VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?);
+                               queryCount,
+                               contentHash)
+        VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?);
         """,
         (
-            fileName,
+            record["fileName"],
             familyId,
-            benchmarkObj["logic"],
+            logicId,
             benchmarkObj["isIncremental"],
             benchmarkObj["size"],
             benchmarkObj["compressedSize"],
@@ -303,46 +623,45 @@ def add_benchmark(dbFile, benchmark, dolmenPath):
             benchmarkObj["application"],
             benchmarkObj["description"],
             benchmarkObj["category"],
-            dolmen,
-            dolmenStrict,
+            record["passesDolmen"],
+            record["passesDolmenStrict"],
             benchmarkObj["queryCount"],
+            record.get("contentHash"),
         ),
     )
     benchmarkId = cursor.lastrowid
 
     if benchmarkObj["targetSolver"]:
-        targetSolvers = benchmarkObj["targetSolver"]
-        # Hacks for the two space sperated cases
-        if targetSolvers == "Boolector Z3 STP":
-            targetSolvers = ["Boolector", "Z3", "STP"]
-        elif targetSolvers == "CVC4 Mathsat SPASS-IQ YICES Z3":
-            targetSolvers = ["CVC4", "Mathsat", "SPASS-IQ", "YICES", "Z3"]
-        else:
-            # Split on '/', " or ", and ","
-            targetSolvers = targetSolvers.replace("/", ",")
-            targetSolvers = targetSolvers.replace(" or ", ",")
-            targetSolvers = targetSolvers.split(",")
-            targetSolvers = map(lambda x: x.strip(), targetSolvers)
-        for targetSolver in targetSolvers:
-            try:
-                id = modules.solvers.global_variant_lookup[targetSolver]
-                cursor.execute(
-                    """
-                       INSERT INTO TargetSolvers(benchmark,
-                                                 solverVariant)
-                       VALUES(?,?);
-                       """,
-                    (benchmarkId, id),
-                )
-            except KeyError:
-                print(f"WARNING: Target solver '{targetSolver}' not known.")
-        connection.commit()
+        variantIds = context.target_solver_ids(benchmarkObj["targetSolver"])
+        cursor.executemany(
+            """
+               INSERT INTO TargetSolvers(benchmark,
+                                         solverVariant)
+               VALUES(?,?);
+               """,
+            [(benchmarkId, id) for id in variantIds],
+        )
 
-    for idx in range(len(queryObjs)):
-        queryObj = queryObjs[idx]
-        cursor.execute(
+    # The query ids are assigned up front, such that the queries of a chunk
+    # can be written with a single `executemany`.  This is safe, because the
+    # insert into Benchmarks above already holds the write lock.
+    firstQueryId = 1
+    for row in cursor.execute("SELECT MAX(id) FROM Queries"):
+        if row[0]:
+            firstQueryId = row[0] + 1
+
+    idx = 0
+    for chunk in querySpool.chunks():
+        queryRows = []
+        for query in chunk:
+            queryId = firstQueryId + idx
+            idx = idx + 1
+            queryRows.append((queryId, benchmarkId, idx) + query)
+
+        cursor.executemany(
             """
-            INSERT INTO Queries(benchmark,
+            INSERT INTO Queries(id,
+                                benchmark,
                                 idx,
                                 normalizedSize,
                                 compressedSize,
@@ -356,42 +675,99 @@ def add_benchmark(dbFile, benchmark, dolmenPath):
                                 defineSortCount,
                                 declareDatatypeCount,
                                 maxTermDepth,
-                                status)
-            VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?,?);
+                                status,
+                                symbolFrequency)
+            VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?);
             """,
-            (
-                benchmarkId,
-                idx + 1,
-                queryObj["normalizedSize"],
-                queryObj["compressedSize"],
-                queryObj["assertsCount"],
-                queryObj["declareFunCount"],
-                queryObj["declareConstCount"],
-                queryObj["declareSortCount"],
-                queryObj["defineFunCount"],
-                queryObj["defineFunRecCount"],
-                queryObj["constantFunCount"],
-                queryObj["defineSortCount"],
-                queryObj["declareDatatypeCount"],
-                queryObj["maxTermDepth"],
-                queryObj["status"],
-            ),
+            queryRows,
         )
-        queryId = cursor.lastrowid
-        symbolCounts = queryObj["symbolFrequency"]
-        for symbolIdx in range(len(symbolCounts)):
-            if symbolCounts[symbolIdx] > 0:
-                connection.execute(
-                    """
-                    INSERT INTO SymbolCounts(symbol,
-                                             query,
-                                             count)
-                    VALUES(?,?,?);
-                    """,
-                    (symbolIdx + 1, queryId, symbolCounts[symbolIdx]),
-                )
-    connection.commit()
-    connection.close()
+    return benchmarkId
+
+
+def table_columns(connection, table):
+    return [row[1] for row in connection.execute(f"PRAGMA table_info({table})")]
+
+
+def copy_benchmark(connection, sourceId, record, context=None):
+    """
+    Adds a benchmark with the same content as the benchmark `sourceId`,
+    but the family and file name of `record`.  The queries and target
+    solvers are copied instead of analyzing the file again.  The logic is
+    copied too, since `insert_benchmark` takes it from the content.
+    Does not commit.  Returns the id of the new benchmark.
+    """
+    if not context:
+        context = IngestContext(connection)
+    familyId = context.family_id(record["familyFolder"])
+
+    columns = [c for c in table_columns(connection, "Benchmarks") if c != "id"]
+    expressions = [
+        {"name": ":name", "family": ":family"}.get(column, column)
+        for column in columns
+    ]
+    cursor = connection.execute(
+        f"""
+        INSERT INTO Benchmarks({", ".join(columns)})
+        SELECT {", ".join(expressions)} FROM Benchmarks WHERE id=:source
+        """,
+        {
+            "name": record["fileName"],
+            "family": familyId,
+            "source": sourceId,
+        },
+    )
+    benchmarkId = cursor.lastrowid
+
+    # The queries of a benchmark have consecutive indices starting at 1.
+    queryOffset = 0
+    for row in connection.execute("SELECT MAX(id) FROM Queries"):
+        queryOffset = row[0] or 0
+    columns = table_columns(connection, "Queries")
+    expressions = [
+        {"id": f"{queryOffset} + idx", "benchmark": "?"}.get(column, column)
+        for column in columns
+    ]
+    connection.execute(
+        f"""
+        INSERT INTO Queries({", ".join(columns)})
+        SELECT {", ".join(expressions)} FROM Queries WHERE benchmark=?
+        """,
+        (benchmarkId, sourceId),
+    )
+    connection.execute(
+        """
+        INSERT INTO TargetSolvers(benchmark, solverVariant)
+        SELECT ?, solverVariant FROM TargetSolvers WHERE benchmark=?
+        """,
+        (benchmarkId, sourceId),
+    )
+    return benchmarkId
+
+
+def find_benchmark_by_hash(connection, contentHash):
+    for row in connection.execute(
+        "SELECT id FROM Benchmarks WHERE contentHash=? LIMIT 1", (contentHash,)
+    ):
+        return row[0]
+    return None
+
+
+def delete_benchmark(connection, benchmarkId):
+    """
+    Removes a benchmark, its queries, and all rows that refer to them.
+    Does not commit.
+    """
+    for table in ["Results", "Ratings"]:
+        connection.execute(
+            f"""
+            DELETE FROM {table}
+            WHERE query IN (SELECT id FROM Queries WHERE benchmark=?)
+            """,
+            (benchmarkId,),
+        )
+    connection.execute("DELETE FROM Queries WHERE benchmark=?", (benchmarkId,))
+    connection.execute("DELETE FROM TargetSolvers WHERE benchmark=?", (benchmarkId,))
+    connection.execute("DELETE FROM Benchmarks WHERE id=?", (benchmarkId,))
 
 
 def guess_benchmark_id(
@@ -454,7 +830,8 @@ def guess_benchmark_id(
     r = connection.execute(
         """
         SELECT Benchmarks.Id FROM Benchmarks INNER JOIN Families ON Families.Id = Benchmarks.family
-            WHERE Benchmarks.name=? AND logic=? AND isIncremental=? AND Families.folderName=?
+            INNER JOIN Logics ON Logics.id = Benchmarks.logic
+            WHERE Benchmarks.name=? AND Logics.logic=? AND isIncremental=? AND Families.folderName=?
         """,
         (fullFilename, logic, isIncremental, familyFoldername),
     )
@@ -0,0 +1,228 @@
+"""
+Connection profiles for the database file.
+
+The database is built in one go by `prepopulate.py`, `bulkadd.py` (or
+`addbenchmark.py`), and `postprocess.py`.  During the build, all scripts
+use the bulk-load profile:
+  * `synchronous=NORMAL`: with WAL, this only syncs when the WAL is
+    checkpointed.  A system crash might lose the last transactions, but
+    does not corrupt the database, such that `bulkadd.py --resume` can
+    continue the build.
+  * a large page cache (`cache_size`) and temporary tables and indices in
+    memory (`temp_store=MEMORY`),
+  * `locking_mode=EXCLUSIVE`: the lock is taken once and kept until the
+    connection is closed.  With WAL this also avoids the shared-memory
+    index.  Hence, only one connection can use the database at a time.
+  * `foreign_keys=OFF`: references are not checked row by row.  Instead
+    `end_bulk_load` runs one `PRAGMA foreign_key_check` at the end.
+`end_bulk_load` also switches the file back to the read profile: the WAL
+is checkpointed and removed (`journal_mode=DELETE`), such that the result
+is a single self-contained file.
+
+This compact file has no indexes.  `finalize.py` derives the
+read-optimized release file from it with `finalize`.
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+
+# In KiB, see the documentation of `PRAGMA cache_size`.
+BULK_CACHE_SIZE = 1024 * 1024
+
+
+def connect_bulk(dbFile, exclusive=True, timeout=30.0):
+    """
+    Opens a connection with the bulk-load profile.  Use `exclusive=False`
+    if several processes write to the database concurrently (e.g., many
+    instances of `addbenchmark.py`).
+    """
+    connection = sqlite3.connect(dbFile, timeout=timeout)
+    if exclusive:
+        # Must be set before WAL mode is entered.
+        connection.execute("PRAGMA locking_mode=EXCLUSIVE")
+    connection.execute("PRAGMA journal_mode=wal")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(f"PRAGMA cache_size=-{BULK_CACHE_SIZE}")
+    connection.execute("PRAGMA temp_store=MEMORY")
+    connection.execute("PRAGMA foreign_keys=OFF")
+    return connection
+
+
+def check_foreign_keys(connection):
+    """
+    Reports all rows that violate a foreign key constraint, grouped by
+    table.  Returns the number of violations.
+    """
+    violations = {}
+    for row in connection.execute("PRAGMA foreign_key_check"):
+        table, _, parent, _ = row
+        violations[(table, parent)] = violations.get((table, parent), 0) + 1
+    for (table, parent), count in sorted(violations.items()):
+        print(f"WARNING: {count} rows in {table} refer to missing rows in {parent}.")
+    return sum(violations.values())
+
+
+def end_bulk_load(connection):
+    """
+    Checks the foreign keys, and switches the database file to the read
+    profile.  Commits.
+    """
+    connection.commit()
+    violations = check_foreign_keys(connection)
+    connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    connection.execute("PRAGMA journal_mode=DELETE")
+    connection.execute("PRAGMA locking_mode=NORMAL")
+    connection.execute("PRAGMA synchronous=FULL")
+    connection.execute("PRAGMA foreign_keys=ON")
+    connection.execute("PRAGMA optimize")
+    # The exclusive lock is only released with the next access.
+    connection.execute("SELECT COUNT(*) FROM sqlite_schema").fetchall()
+    return violations
+
+
+# Default page size of the read-optimized file.  Larger pages make the
+# b-trees flatter, hence lookups touch fewer pages.
+READ_PAGE_SIZE = 8192
+
+# Indexes of the read-optimized file, chosen from the queries of the webapp,
+# the static pages, and the studies.  Where possible, an index contains all
+# columns a query reads from the table, such that the table is not read.
+read_indexes = [
+    # The queries of a benchmark, by index.
+    ("queryBenchmarkIdx", "Queries(benchmark, idx, status, inferredStatus)"),
+    # The results and ratings of a query.
+    (
+        "resultQueryIdx",
+        "Results(query, evaluation, solverVariant, status, cpuTime, wallclockTime)",
+    ),
+    (
+        "ratingQueryIdx",
+        "Ratings(query, evaluation, rating, consideredSolvers, successfulSolvers)",
+    ),
+    # Solvers and solved queries per evaluation.
+    ("resultEvaluationIdx", "Results(evaluation, status, solverVariant, query)"),
+    # Benchmarks by logic (timeline, logic pages, studies) and by family
+    # (search bar, family pages).
+    ("benchmarkLogicIdx", "Benchmarks(logic, isIncremental, category, family)"),
+    ("benchmarkFamilyIdx", "Benchmarks(family, logic, name)"),
+    ("solverVariantSolverIdx", "SolverVariants(solver)"),
+    ("evaluationDateIdx", "Evaluations(date)"),
+]
+
+# With the clustered layout of the results (see `cluster_results`), the
+# primary key of ResultsClustered takes the place of resultQueryIdx.
+clustered_result_indexes = [
+    ("resultEvaluationIdx", "ResultsClustered(evaluation, status, solverVariant)"),
+]
+
+
+def connect_read(dbFile):
+    """
+    Opens a read-only connection to a finished database file.  The file is
+    opened as immutable, hence SQLite does no locking and no change
+    detection.  The file must not be modified while it is open.
+    """
+    uri = Path(dbFile).resolve().as_uri() + "?immutable=1"
+    return sqlite3.connect(uri, uri=True)
+
+
+def cluster_results(connection):
+    """
+    Replaces the Results table by the table ResultsClustered and a view
+    named Results.  ResultsClustered is a WITHOUT ROWID table with the
+    primary key (query, evaluation, solverVariant, copy), hence the results
+    of a query are stored next to each other.  `copy` numbers the results of
+    a solver variant for a query in an evaluation, such that no result is
+    lost if there are several.  The times are stored as integer
+    milliseconds, and the view converts them back to seconds.  The view has
+    all columns of Results except `id`.  Since a view cannot be written to,
+    this is only done for the release file.  Commits.
+    """
+    connection.execute(
+        """CREATE TABLE ResultsClustered(
+        query INT NOT NULL,
+        evaluation INT NOT NULL,
+        solverVariant INT NOT NULL,
+        copy INT NOT NULL,
+        cpuTime INT,
+        wallclockTime INT,
+        status INT,
+        PRIMARY KEY(query, evaluation, solverVariant, copy),
+        FOREIGN KEY(query) REFERENCES Queries(id)
+        FOREIGN KEY(evaluation) REFERENCES Evaluations(id)
+        FOREIGN KEY(solverVariant) REFERENCES SolverVariants(id)
+        FOREIGN KEY(status) REFERENCES Statuses(id)
+    ) WITHOUT ROWID;"""
+    )
+    # Sorted by the primary key, the rows are appended to the b-tree.
+    connection.execute(
+        """
+        INSERT INTO ResultsClustered(query, evaluation, solverVariant, copy,
+                                     cpuTime, wallclockTime, status)
+        SELECT query, evaluation, solverVariant,
+               ROW_NUMBER() OVER (
+                   PARTITION BY query, evaluation, solverVariant ORDER BY id
+               ) - 1,
+               CAST(ROUND(cpuTime * 1000) AS INT),
+               CAST(ROUND(wallclockTime * 1000) AS INT),
+               status
+        FROM Results
+        ORDER BY query, evaluation, solverVariant, id
+        """
+    )
+    connection.execute("DROP TABLE Results")
+    connection.execute(
+        """
+        CREATE VIEW Results AS
+        SELECT evaluation, query, solverVariant,
+               cpuTime / 1000.0 AS cpuTime,
+               wallclockTime / 1000.0 AS wallclockTime,
+               status
+        FROM ResultsClustered
+        """
+    )
+    connection.commit()
+
+
+def finalize(dbFile, outFile, pageSize=READ_PAGE_SIZE, clusterResults=False):
+    """
+    Writes the read-optimized variant of the compact database `dbFile` to
+    `outFile`: with the indexes in `read_indexes`, statistics for the query
+    planner, the given page size, and a rollback journal.  With
+    `clusterResults`, the results are stored with `cluster_results`.
+    `dbFile` is not modified.
+    """
+    tmpFile = f"{outFile}.tmp"
+    for f in [outFile, tmpFile]:
+        if os.path.exists(f):
+            os.remove(f)
+    source = sqlite3.connect(dbFile)
+    source.execute("VACUUM INTO ?", (tmpFile,))
+    source.close()
+
+    connection = sqlite3.connect(tmpFile)
+    connection.execute(f"PRAGMA cache_size=-{BULK_CACHE_SIZE}")
+    connection.execute("PRAGMA temp_store=MEMORY")
+    indexes = read_indexes
+    if clusterResults:
+        print("Clustering the results")
+        cluster_results(connection)
+        indexes = [i for i in read_indexes if not i[1].startswith("Results(")]
+        indexes = indexes + clustered_result_indexes
+    for name, definition in indexes:
+        print(f"Creating index {name} on {definition}")
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+    connection.commit()
+    connection.execute("ANALYZE")
+    connection.commit()
+    # The indexes were appended to the file.  Copying the file again stores
+    # every table and index contiguously, with the new page size.
+    connection.execute(f"PRAGMA page_size={int(pageSize)}")
+    connection.execute("VACUUM INTO ?", (str(outFile),))
+    connection.close()
+    os.remove(tmpFile)
+
+    connection = sqlite3.connect(outFile)
+    connection.execute("PRAGMA journal_mode=DELETE")
+    connection.close()
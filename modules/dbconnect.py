@@ -0,0 +1,77 @@
+"""
+Opens the database for the scripts in `studies` and `static-page`: either
+the SQLite file, or the DuckDB companion file written by
+`export_duckdb.py`.
+
+DuckDB connections are wrapped such that the scripts can use them like
+sqlite3 connections: `execute` takes `?` parameters and returns a cursor
+that can be iterated, and rows can be indexed by position or by column
+name (like `sqlite3.Row`).  The queries must be valid in both dialects.
+"""
+
+import sqlite3
+
+
+class Row(tuple):
+    def __new__(cls, names, values):
+        row = super().__new__(cls, values)
+        row.names = names
+        return row
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return super().__getitem__(self.names.index(key))
+        return super().__getitem__(key)
+
+    def keys(self):
+        return list(self.names)
+
+
+class DuckdbCursor:
+    def __init__(self, result):
+        self.result = result
+        self.names = [d[0] for d in result.description] if result != None else []
+
+    def fetchone(self):
+        row = self.result.fetchone() if self.result != None else None
+        return None if row == None else Row(self.names, row)
+
+    def fetchall(self):
+        if self.result == None:
+            return []
+        return [Row(self.names, row) for row in self.result.fetchall()]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+
+class DuckdbConnection:
+    def __init__(self, database):
+        try:
+            import duckdb
+        except ImportError:
+            raise Exception("--duckdb needs the duckdb package, see pyproject.toml.")
+
+        self.connection = duckdb.connect(str(database), read_only=True)
+        self.row_factory = None
+
+    def execute(self, query, parameters=()):
+        if query.strip().upper().startswith("PRAGMA"):
+            # SQLite settings, e.g., the page cache, are ignored.
+            return DuckdbCursor(None)
+        # Every query gets its own cursor, such that results that are not
+        # yet fetched are not overwritten by the next query.
+        cursor = self.connection.cursor()
+        return DuckdbCursor(cursor.execute(query, list(parameters)))
+
+    def cursor(self):
+        return self
+
+    def close(self):
+        self.connection.close()
+
+
+def connect(database, useDuckdb=False):
+    if useDuckdb:
+        return DuckdbConnection(database)
+    return sqlite3.connect(database)
@@ -0,0 +1,456 @@
+"""
+Row-level deltas between two releases of the database.
+
+The ids of a release are surrogate keys: a release built from scratch
+numbers the benchmarks differently than the previous one.  Hence, rows are
+compared in their natural form: every id is replaced by a natural key that
+does not depend on the numbering (the path of a benchmark, the name of an
+evaluation, and so on, see `key_queries`).  Tables with a natural key are
+compared by key, the other tables (results, ratings, target solvers) by
+the whole row.  Rows of these tables can occur more than once, hence they
+are compared as multisets.
+
+A delta is an SQLite file.  For every table T it contains
+  * the table T with the new and changed rows in natural form, and
+  * the table T_deleted with the natural keys of the deleted rows, or the
+    deleted rows in natural form if T has no natural key.
+If T has no natural key, both tables have the additional column
+`deltaCount`: the number of copies of the row that are added or deleted.
+The table DeltaTables lists the number of rows of every table before and
+after the change.  Applying the delta translates the natural keys back to
+the ids of the database it is applied to.  Rows that are not changed keep
+their ids, and new rows get fresh ids.  Hence, the result has the same
+content as the new release, but not necessarily the same ids.
+
+The symbol index is derived from the queries by id and is rebuilt after
+applying a delta.  Deltas are made between compact files, not between
+read-optimized files (see `finalize.py`).
+"""
+
+from modules import symbolindex
+
+# The tables in the order they are filled: referenced tables first.
+tables = [
+    "Statuses",
+    "Symbols",
+    "Licenses",
+    "Logics",
+    "Families",
+    "Solvers",
+    "Evaluations",
+    "SolverVariants",
+    "Benchmarks",
+    "Queries",
+    "Results",
+    "Ratings",
+    "TargetSolvers",
+    "Manifest",
+]
+
+# Tables that are derived from the other tables and rebuilt instead.
+derived_tables = ["SymbolPostings"]
+
+# Queries that return the (row key, natural key) pairs of the tables with a
+# natural key.  `{s}` is the schema.  Keys of referenced tables are taken
+# from their key tables, which are built first.
+key_queries = {
+    # Statuses and symbols have fixed ids.
+    "Statuses": "SELECT id, id FROM {s}.Statuses",
+    "Symbols": "SELECT id, id FROM {s}.Symbols",
+    "Licenses": "SELECT id, name FROM {s}.Licenses",
+    "Logics": "SELECT id, logic FROM {s}.Logics",
+    "Families": "SELECT id, folderName FROM {s}.Families",
+    "Solvers": "SELECT id, name FROM {s}.Solvers",
+    "Evaluations": "SELECT id, name FROM {s}.Evaluations",
+    "SolverVariants": """
+        SELECT sv.id, COALESCE(e.nk, '') || '/' || sv.fullName
+        FROM {s}.SolverVariants AS sv
+        LEFT JOIN temp.{s}EvaluationsKeys AS e ON e.id = sv.evaluation
+        """,
+    "Benchmarks": """
+        SELECT b.id,
+               CASE WHEN b.isIncremental THEN 'incremental'
+                    ELSE 'non-incremental' END
+               || '/' || COALESCE(l.nk, '') || '/' || COALESCE(f.nk, '')
+               || '/' || b.name
+        FROM {s}.Benchmarks AS b
+        LEFT JOIN temp.{s}LogicsKeys AS l ON l.id = b.logic
+        LEFT JOIN temp.{s}FamiliesKeys AS f ON f.id = b.family
+        """,
+    "Queries": """
+        SELECT q.id, COALESCE(b.nk, '') || '#' || q.idx
+        FROM {s}.Queries AS q
+        LEFT JOIN temp.{s}BenchmarksKeys AS b ON b.id = q.benchmark
+        """,
+    "Manifest": "SELECT path, path FROM {s}.Manifest",
+}
+
+# Column of the delta tables without natural key, see above.
+COUNT_COLUMN = "deltaCount"
+
+# The column that identifies a row, if it is not `id`.
+row_keys = {"Manifest": "path"}
+
+# Tables whose row key is kept when a row is inserted, because it is the
+# natural key itself.
+kept_keys = ["Statuses", "Symbols", "Manifest"]
+
+# Columns that refer to tables with a natural key.  Statuses and symbols
+# are not listed, since their ids are fixed.
+references = {
+    "SolverVariants": {"solver": "Solvers", "evaluation": "Evaluations"},
+    "Benchmarks": {"family": "Families", "logic": "Logics", "license": "Licenses"},
+    "Queries": {"benchmark": "Benchmarks"},
+    "Results": {
+        "evaluation": "Evaluations",
+        "query": "Queries",
+        "solverVariant": "SolverVariants",
+    },
+    "Ratings": {"query": "Queries", "evaluation": "Evaluations"},
+    "TargetSolvers": {"benchmark": "Benchmarks", "solverVariant": "SolverVariants"},
+    "Manifest": {"benchmark": "Benchmarks"},
+}
+
+
+def row_key(table):
+    return row_keys.get(table, "id")
+
+
+def table_names(connection, schema):
+    names = set()
+    for name, type in connection.execute(
+        f"""
+        SELECT name, type FROM {schema}.sqlite_schema
+        WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'
+        """
+    ):
+        if type == "view":
+            raise Exception(
+                f"{schema}: contains the view {name}, use the compact database."
+            )
+        names.add(name)
+    return names
+
+
+def table_columns(connection, schema, table):
+    return [
+        row[1] for row in connection.execute(f"PRAGMA {schema}.table_info({table})")
+    ]
+
+
+def check_schemas(connection, schemas):
+    """
+    Checks that the schemas have the same tables and columns, and that all
+    tables are known.  Returns the tables to compare.
+    """
+    names = [table_names(connection, schema) for schema in schemas]
+    for schema, other in zip(schemas[1:], names[1:]):
+        if other != names[0]:
+            raise Exception(f"{schema}: the tables differ from {schemas[0]}.")
+    for table in names[0]:
+        if table not in tables and table not in derived_tables:
+            raise Exception(f"Unknown table {table}.")
+        columns = table_columns(connection, schemas[0], table)
+        for schema in schemas[1:]:
+            if table_columns(connection, schema, table) != columns:
+                raise Exception(f"{schema}: the columns of {table} differ.")
+    return [table for table in tables if table in names[0]]
+
+
+def build_keys(connection, schema, selected=tables):
+    """
+    Builds the temporary key tables of the tables in `selected`.  Raises an
+    exception if a natural key is not unique.
+    """
+    present = table_names(connection, schema)
+    for table in selected:
+        if table not in key_queries or table not in present:
+            continue
+        keys = f"{schema}{table}Keys"
+        connection.execute(f"DROP TABLE IF EXISTS temp.{keys}")
+        # The type of `id` must match the row key, or the index on `id` is
+        # not used for joins.
+        idType = "TEXT" if table in row_keys else "INTEGER"
+        connection.execute(f"CREATE TEMP TABLE {keys}(id {idType} PRIMARY KEY, nk)")
+        connection.execute(
+            f"INSERT INTO temp.{keys}(id, nk) {key_queries[table].format(s=schema)}"
+        )
+        connection.execute(f"CREATE INDEX temp.{keys}Nk ON {keys}(nk)")
+        for row in connection.execute(
+            f"SELECT nk FROM temp.{keys} GROUP BY nk HAVING COUNT(*) > 1 LIMIT 1"
+        ):
+            raise Exception(f"{schema}: {table} contains the key {row[0]} twice.")
+
+
+def natural_columns(connection, schema, table):
+    """
+    Returns the columns of the natural form.  Tables without a natural key
+    lose their surrogate id.
+    """
+    columns = table_columns(connection, schema, table)
+    if table not in key_queries:
+        columns = [c for c in columns if c != "id"]
+    return columns
+
+
+def natural_query(connection, schema, table, withRowid=False):
+    """
+    Returns a query for the rows of `table` in natural form: the row key is
+    replaced by the natural key, and references by the natural keys of the
+    referenced rows.  With `withRowid`, the first column is the rowid.
+    """
+    refs = references.get(table, {})
+    expressions = ["t.rowid AS rid"] if withRowid else []
+    joins = []
+    for column in natural_columns(connection, schema, table):
+        if table in key_queries and column == row_key(table):
+            joins.append(
+                f"LEFT JOIN temp.{schema}{table}Keys AS k ON k.id = t.{column}"
+            )
+            expressions.append(f'k.nk AS "{column}"')
+        elif column in refs:
+            alias = f"r{len(joins)}"
+            joins.append(
+                f"LEFT JOIN temp.{schema}{refs[column]}Keys AS {alias} "
+                f"ON {alias}.id = t.{column}"
+            )
+            expressions.append(f'{alias}.nk AS "{column}"')
+        else:
+            expressions.append(f't."{column}"')
+    return f"""
+        SELECT {", ".join(expressions)}
+        FROM {schema}.{table} AS t {" ".join(joins)}
+        """
+
+
+def row_count(connection, schema, table):
+    return connection.execute(f"SELECT COUNT(*) FROM {schema}.{table}").fetchone()[0]
+
+
+def delta_count(connection, table):
+    """
+    Returns the number of rows added or deleted by the delta table `table`
+    of the main database.
+    """
+    if table.removesuffix("_deleted") in key_queries:
+        return row_count(connection, "main", table)
+    return connection.execute(
+        f"SELECT COALESCE(SUM({COUNT_COLUMN}), 0) FROM main.{table}"
+    ).fetchone()[0]
+
+
+def compare_rows(connection, table):
+    """
+    Writes the differences of the multisets of rows of a table without
+    natural key to the tables `table` and `table_deleted` of the main
+    database.
+    """
+    columns = ", ".join(f'"{c}"' for c in natural_columns(connection, "new", table))
+    newRows = natural_query(connection, "new", table)
+    oldRows = natural_query(connection, "old", table)
+    # `GROUP BY` treats NULL values as equal, e.g., missing times.
+    connection.execute(
+        f"""
+        CREATE TEMP TABLE {table}Counts AS
+        SELECT {columns}, SUM(sign) AS {COUNT_COLUMN} FROM (
+            SELECT *, 1 AS sign FROM ({newRows})
+            UNION ALL
+            SELECT *, -1 AS sign FROM ({oldRows})
+        )
+        GROUP BY {columns} HAVING SUM(sign) != 0
+        """
+    )
+    connection.execute(
+        f"""
+        CREATE TABLE main.{table} AS
+        SELECT {columns}, {COUNT_COLUMN} FROM temp.{table}Counts
+        WHERE {COUNT_COLUMN} > 0
+        """
+    )
+    connection.execute(
+        f"""
+        CREATE TABLE main.{table}_deleted AS
+        SELECT {columns}, -{COUNT_COLUMN} AS {COUNT_COLUMN}
+        FROM temp.{table}Counts WHERE {COUNT_COLUMN} < 0
+        """
+    )
+    connection.execute(f"DROP TABLE temp.{table}Counts")
+
+
+def make_delta(connection):
+    """
+    Writes the delta from the attached database `old` to the attached
+    database `new` into the main database, which must be empty.  Returns
+    the number of changed rows per table.  Commits.
+    """
+    selected = check_schemas(connection, ["old", "new"])
+    build_keys(connection, "old")
+    build_keys(connection, "new")
+    connection.execute(
+        """CREATE TABLE DeltaTables(
+        name TEXT PRIMARY KEY,
+        baseRows INT NOT NULL,
+        resultRows INT NOT NULL
+    );"""
+    )
+    changes = {}
+    for table in selected:
+        if table in key_queries:
+            newRows = natural_query(connection, "new", table)
+            oldRows = natural_query(connection, "old", table)
+            connection.execute(
+                f"CREATE TABLE main.{table} AS {newRows} EXCEPT {oldRows}"
+            )
+            connection.execute(
+                f"""
+                CREATE TABLE main.{table}_deleted AS
+                SELECT nk FROM temp.old{table}Keys
+                EXCEPT SELECT nk FROM temp.new{table}Keys
+                """
+            )
+        else:
+            compare_rows(connection, table)
+        connection.execute(
+            "INSERT INTO DeltaTables(name, baseRows, resultRows) VALUES(?,?,?)",
+            (
+                table,
+                row_count(connection, "old", table),
+                row_count(connection, "new", table),
+            ),
+        )
+        changes[table] = (
+            delta_count(connection, table),
+            delta_count(connection, f"{table}_deleted"),
+        )
+        connection.commit()
+    return changes
+
+
+def translated(connection, table, insert):
+    """
+    Returns the (column, expression) pairs that translate a row `d` of the
+    delta back to ids of the main database.
+    """
+    refs = references.get(table, {})
+    result = []
+    for column in natural_columns(connection, "main", table):
+        if table in key_queries and column == row_key(table):
+            if insert and table in kept_keys:
+                result.append((column, f'd."{column}"'))
+        elif column in refs:
+            keys = f"temp.main{refs[column]}Keys"
+            result.append((column, f'(SELECT id FROM {keys} WHERE nk = d."{column}")'))
+        else:
+            result.append((column, f'd."{column}"'))
+    return result
+
+
+def delete_rows(connection, table):
+    if table in key_queries:
+        connection.execute(
+            f"""
+            DELETE FROM main.{table} WHERE {row_key(table)} IN (
+                SELECT id FROM temp.main{table}Keys
+                WHERE nk IN (SELECT nk FROM delta.{table}_deleted))
+            """
+        )
+        return
+    # `IS` also matches NULL values, e.g., missing times.  Of equal rows,
+    # only `deltaCount` are deleted.
+    matches = " AND ".join(
+        f'n."{c}" IS d."{c}"' for c in natural_columns(connection, "main", table)
+    )
+    connection.execute(
+        f"""
+        DELETE FROM main.{table} WHERE rowid IN (
+            SELECT rid FROM (
+                SELECT n.rid, d.{COUNT_COLUMN},
+                       ROW_NUMBER() OVER (PARTITION BY d.rowid ORDER BY n.rid) AS copy
+                FROM ({natural_query(connection, "main", table, True)}) AS n
+                JOIN delta.{table}_deleted AS d ON {matches})
+            WHERE copy <= {COUNT_COLUMN})
+        """
+    )
+
+
+def upsert_rows(connection, table):
+    key = row_key(table)
+    if table in key_queries:
+        update = translated(connection, table, False)
+        if update:
+            connection.execute(
+                f"""
+                UPDATE main.{table}
+                SET {", ".join(f'"{c}" = x."{c}"' for c, _ in update)}
+                FROM (
+                    SELECT k.id AS targetKey,
+                           {", ".join(f'{e} AS "{c}"' for c, e in update)}
+                    FROM delta.{table} AS d
+                    JOIN temp.main{table}Keys AS k ON k.nk = d."{key}"
+                ) AS x
+                WHERE {table}.{key} = x.targetKey
+                """
+            )
+    insert = translated(connection, table, True)
+    if table in key_queries:
+        source = f"""
+            delta.{table} AS d
+            WHERE d."{key}" NOT IN (SELECT nk FROM temp.main{table}Keys)
+            """
+    else:
+        # Every row is inserted `deltaCount` times.
+        source = f"""
+            delta.{table} AS d
+            JOIN (
+                WITH RECURSIVE copies(n) AS (
+                    SELECT 1 UNION ALL SELECT n + 1 FROM copies
+                    WHERE n < (SELECT MAX({COUNT_COLUMN}) FROM delta.{table})
+                )
+                SELECT n FROM copies
+            ) AS c ON c.n <= d.{COUNT_COLUMN}
+            """
+    connection.execute(
+        f"""
+        INSERT INTO main.{table}({", ".join(f'"{c}"' for c, _ in insert)})
+        SELECT {", ".join(e for _, e in insert)}
+        FROM {source}
+        """
+    )
+    build_keys(connection, "main", [table])
+
+
+def apply_delta(connection):
+    """
+    Applies the attached delta `delta` to the main database.  Checks first
+    that the delta was made from a database with the same number of rows.
+    Returns the number of tables whose row count differs from the new
+    release afterwards.  Does not commit.
+    """
+    expected = {}
+    for table, baseRows, resultRows in connection.execute(
+        "SELECT name, baseRows, resultRows FROM delta.DeltaTables"
+    ):
+        if row_count(connection, "main", table) != baseRows:
+            raise Exception(f"{table}: the delta was made for another database.")
+        expected[table] = resultRows
+    selected = [table for table in tables if table in expected]
+    check_schemas(connection, ["main"])
+
+    build_keys(connection, "main")
+    # Children first, while the keys of their parents are still known.
+    for table in reversed(selected):
+        delete_rows(connection, table)
+    build_keys(connection, "main")
+    for table in selected:
+        upsert_rows(connection, table)
+
+    if "SymbolPostings" in table_names(connection, "main"):
+        symbolindex.build_index(connection)
+
+    mismatches = 0
+    for table in selected:
+        count = row_count(connection, "main", table)
+        if count != expected[table]:
+            print(f"WARNING: {table} has {count} rows instead of {expected[table]}.")
+            mismatches = mismatches + 1
+    return mismatches
@@ -0,0 +1,144 @@
+"""
+Validation of benchmarks with the Dolmen checker.
+
+Every benchmark is checked twice: once in lax mode (`--strict=false`) and
+once in strict mode (`--strict=true`).  Since the results only depend on
+the content of the file and the Dolmen version, they can be cached across
+database builds in a separate SQLite file.
+"""
+
+import time
+import asyncio
+import sqlite3
+import subprocess
+
+from modules import executor
+
+
+def dolmen_status(returnCode):
+    """
+    Maps the return code of Dolmen to the value stored in the database.
+    The return codes 2 and 125 indicate that Dolmen itself failed (e.g.,
+    it ran out of memory).  In this case the result is unknown.
+    """
+    if returnCode == 2 or returnCode == 125:
+        return None
+    return returnCode == 0
+
+
+def dolmen_version(dolmenPath):
+    version = executor.run_tool(
+        "dolmen",
+        [dolmenPath, "--version"],
+        stdout=subprocess.PIPE,
+        check=True,
+    )
+    return version.stdout.decode().strip()
+
+
+async def run_check(toolExecutor, benchmark, dolmenPath, strict, timings=None):
+    """
+    Runs one Dolmen check.  A timeout counts as unknown result.  The input
+    language is given explicitly, since the path might not end in `.smt2`
+    (e.g., for benchmarks read from an archive).  If the check completes,
+    its duration is stored in the dictionary `timings` under "dolmenLax"
+    or "dolmenStrict".
+    """
+    strictFlag = "--strict=true" if strict else "--strict=false"
+    start = time.monotonic()
+    try:
+        result = await toolExecutor.run(
+            "dolmen",
+            [dolmenPath, "-s", "4G", "-i", "smt2", strictFlag, str(benchmark)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except executor.ToolTimeout:
+        result = None
+    if timings != None:
+        stage = "dolmenStrict" if strict else "dolmenLax"
+        timings[stage] = time.monotonic() - start
+    if not result:
+        return None
+    return dolmen_status(result.returncode)
+
+
+async def run_dolmen(toolExecutor, benchmark, dolmenPath, timings=None):
+    """
+    Runs the lax and the strict check concurrently.  Returns the pair
+    (passesDolmen, passesDolmenStrict).  See `run_check` for `timings`.
+    Every error reported in lax mode is also an error in strict mode.
+    Hence, if the lax check fails, the strict check is stopped early.
+    """
+    lax = asyncio.ensure_future(
+        run_check(toolExecutor, benchmark, dolmenPath, False, timings)
+    )
+    strict = asyncio.ensure_future(
+        run_check(toolExecutor, benchmark, dolmenPath, True, timings)
+    )
+    try:
+        passesDolmen = await lax
+    except BaseException:
+        strict.cancel()
+        raise
+    if passesDolmen == False:
+        strict.cancel()
+        try:
+            await strict
+        except asyncio.CancelledError:
+            pass
+        return False, False
+    return passesDolmen, await strict
+
+
+class DolmenCache:
+    """
+    Cache of Dolmen results, stored in its own SQLite file, keyed by the
+    content hash of the benchmark and the Dolmen version.  Unknown results
+    (Dolmen failed) are not cached, since they might be transient.
+    """
+
+    def __init__(self, cacheFile, version):
+        self.version = version
+        self.connection = sqlite3.connect(cacheFile, timeout=30.0)
+        self.connection.execute("PRAGMA journal_mode=wal")
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS DolmenResults(
+            contentHash TEXT NOT NULL,
+            version TEXT NOT NULL,
+            passesDolmen BOOL NOT NULL,
+            passesDolmenStrict BOOL NOT NULL,
+            PRIMARY KEY(contentHash, version)
+        );"""
+        )
+        self.connection.commit()
+
+    def get(self, contentHash):
+        for row in self.connection.execute(
+            """
+            SELECT passesDolmen, passesDolmenStrict FROM DolmenResults
+            WHERE contentHash=? AND version=?
+            """,
+            (contentHash, self.version),
+        ):
+            return bool(row[0]), bool(row[1])
+        return None
+
+    def put(self, contentHash, passesDolmen, passesDolmenStrict):
+        if passesDolmen == None or passesDolmenStrict == None:
+            return
+        self.connection.execute(
+            """
+            INSERT OR REPLACE INTO DolmenResults(contentHash, version,
+                                                 passesDolmen, passesDolmenStrict)
+            VALUES(?,?,?,?);
+            """,
+            (contentHash, self.version, passesDolmen, passesDolmenStrict),
+        )
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
@@ -6,7 +6,7 @@ import re
 import sqlite3
 
 from pathlib import Path
-from modules import benchmarks
+from modules import benchmarks, executor, statuses
 from bs4 import BeautifulSoup
 
 import modules.solvers
@@ -34,10 +34,11 @@ def setup_evaluations(connection):
         solverVariant INT,
         cpuTime REAL,
         wallclockTime REAL,
-        status TEXT,
+        status INT,
         FOREIGN KEY(evaluation) REFERENCES Evaluations(id)
         FOREIGN KEY(query) REFERENCES Queries(id)
         FOREIGN KEY(solverVariant) REFERENCES SolverVariants(id)
+        FOREIGN KEY(status) REFERENCES Statuses(id)
         );"""
     )
 
@@ -112,10 +113,8 @@ def print_stats_dict(stats):
 
 def benchmark_status(solved_status):
     if solved_status in ["-", "starexec-unknown"]:
-        return "unknown"
-    if not solved_status in ["sat", "unsat"]:
-        return "unknown"
-    return solved_status
+        return statuses.UNKNOWN
+    return statuses.status_code(solved_status)
 
 
 old_header_regex = r"^Detailed results for (.+) at ([A-Z0-9_]+)$"
@@ -174,9 +173,9 @@ def add_smt_comp_early(connection, year, date):
             assert len(tds) == 4
             correct = tds[3].text
             if not correct == "yes":
-                answer = "unknown"
+                answer = statuses.UNKNOWN
             else:
-                answer = tds[1].text
+                answer = benchmark_status(tds[1].text)
 
             try:
                 time = float(tds[2].text)
@@ -374,10 +373,11 @@ def add_smt_comp_2014(connection, compressedCsvFilename):
     connection.commit()
     print(f"Adding SMT-COMP 2014 results")
     with tempfile.TemporaryDirectory() as tmpdir:
-        subprocess.run(
-            f"tar -xf '{compressedCsvFilename}'",
+        executor.run_tool(
+            "tar",
+            ["tar", "-xf", str(compressedCsvFilename)],
             cwd=tmpdir,
-            shell=True,
+            check=True,
         )
         csvName = Path(compressedCsvFilename.stem).stem
         with open(f"{tmpdir}/{csvName}.csv", newline="") as csvfile:
@@ -430,10 +430,11 @@ def add_smt_comp_oldstyle(connection, compressedCsvFilename, year, date):
     connection.commit()
     print(f"Adding oldstyle SMT-COMP {year} results")
     with tempfile.TemporaryDirectory() as tmpdir:
-        subprocess.run(
-            f"tar -xf '{compressedCsvFilename}'",
+        executor.run_tool(
+            "tar",
+            ["tar", "-xf", str(compressedCsvFilename)],
             cwd=tmpdir,
-            shell=True,
+            check=True,
         )
         csvName = Path(compressedCsvFilename.stem).stem
         with open(f"{tmpdir}/{csvName}.csv", newline="") as csvfile:
@@ -498,9 +499,10 @@ def add_smt_comp_generic(connection, folder, year, date):
     connection.commit()
     print(f"Adding SMT-COMP {year} results")
     with tempfile.TemporaryDirectory() as tmpdir:
-        subprocess.run(
-            f"gunzip -fk {folder}/data/results-sq-{year}.json.gz",
-            shell=True,
+        executor.run_tool(
+            "gunzip",
+            ["gunzip", "-fk", f"{folder}/data/results-sq-{year}.json.gz"],
+            check=True,
         )
         with open(f"{folder}/data/results-sq-{year}.json") as resultfile:
             jsonObject = json.load(resultfile)
@@ -599,11 +601,12 @@ def add_smt_comp_inc_2024(connection, rawfolder):
         ):
             solverVariantId = r[0]
         with tempfile.TemporaryDirectory() as tmpdir:
-            subprocess.run(
-                f"unzip '{p}'",
+            executor.run_tool(
+                "unzip",
+                ["unzip", str(p)],
                 cwd=tmpdir,
-                shell=True,
                 stdout=subprocess.DEVNULL,
+                check=True,
             )
             for logfile in Path(tmpdir).glob("**/*yml.log"):
                 try:
@@ -779,10 +782,10 @@ def add_eval_ratings(connection, evaluationId):
                 SELECT COUNT(DISTINCT s.id) FROM Solvers AS s
                     INNER JOIN SolverVariants AS sv ON sv.solver = s.id
                     INNER JOIN Results AS r ON sv.Id = r.solverVariant
-                WHERE (r.status = 'unsat' OR r.status = 'sat')
+                WHERE (r.status = ? OR r.status = ?)
                     AND r.query=? AND r.evaluation=?
                 """,
-                (query, evaluationId),
+                (statuses.UNSAT, statuses.SAT, query, evaluationId),
             ):
                 benchmarkSolvers = benchmarkSolversRow[0]
             rating = 1 - benchmarkSolvers / logicSolvers
@@ -825,18 +828,18 @@ def add_inferred_status(connection):
     # solvers gave the same answer and there was no disagreement.
     connection.execute(
         """
-        UPDATE Queries AS ss SET inferredStatus = "sat"
+        UPDATE Queries AS ss SET inferredStatus = :sat
         WHERE ss.id IN (
             SELECT res1.query FROM Results AS res1
               INNER JOIN SolverVariants AS var1 ON var1.id = res1.solverVariant
               INNER JOIN Queries AS sub ON sub.id == res1.query
-              WHERE res1.status == "sat"
+              WHERE res1.status == :sat
                 AND NOT EXISTS (
                         SELECT NULL
                         FROM Results AS res2
                         WHERE res1.query == res2.query
                           AND res1.evaluation == res2.evaluation
-                          AND res2.status == "unsat"
+                          AND res2.status == :unsat
                     )
                 AND EXISTS (
                         SELECT NULL
@@ -845,28 +848,29 @@ def add_inferred_status(connection):
                         WHERE res1.query == res2.query
                           AND var1.solver <> var2.solver
                           AND res1.evaluation == res2.evaluation
-                          AND res2.status == "sat"
+                          AND res2.status == :sat
                     )
             GROUP BY res1.query
         )
-        """
+        """,
+        {"sat": statuses.SAT, "unsat": statuses.UNSAT},
     )
     connection.commit()
     print(f"Add inferred unsat status.")
     connection.execute(
         """
-        UPDATE Queries AS ss SET inferredStatus = "unsat"
+        UPDATE Queries AS ss SET inferredStatus = :unsat
         WHERE ss.id IN (
             SELECT res1.query FROM Results AS res1
               INNER JOIN SolverVariants AS var1 ON var1.id = res1.solverVariant
               INNER JOIN Queries AS sub ON sub.id == res1.query
-              WHERE res1.status == "unsat"
+              WHERE res1.status == :unsat
                 AND NOT EXISTS (
                         SELECT NULL
                         FROM Results AS res2
                         WHERE res1.query == res2.query
                           AND res1.evaluation == res2.evaluation
-                          AND res2.status == "sat"
+                          AND res2.status == :sat
                     )
                 AND EXISTS (
                         SELECT NULL
@@ -875,11 +879,12 @@ def add_inferred_status(connection):
                         WHERE res1.query == res2.query
                           AND var1.solver <> var2.solver
                           AND res1.evaluation == res2.evaluation
-                          AND res2.status == "unsat"
+                          AND res2.status == :unsat
                     )
             GROUP BY res1.query
         )
-        """
+        """,
+        {"sat": statuses.SAT, "unsat": statuses.UNSAT},
     )
     connection.commit()
 
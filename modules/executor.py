@@ -0,0 +1,180 @@
+"""
+Runs the external tools used while building the database (klhm, Dolmen,
+and the archive tools) as asyncio subprocesses.
+
+Each tool has its own limits:
+  * concurrency: number of processes of the tool that may run at the same
+    time within one `Executor`,
+  * timeout: wall clock limit in seconds,
+  * memory: limit of the address space in bytes,
+  * retries: how often a failed run is repeated,
+  * backoff: seconds to wait before the first retry.  The waiting time
+    doubles with every further retry.
+A run fails if the tool cannot be started, exceeds its time limit, or, with
+`check=True`, terminates with a non-zero return code.
+"""
+
+import os
+import asyncio
+import resource
+import subprocess
+
+GB = 1024 * 1024 * 1024
+
+default_limits = {
+    "concurrency": os.cpu_count(),
+    "timeout": None,
+    "memory": None,
+    "retries": 0,
+    "backoff": 1.0,
+}
+
+# klhm memory maps the benchmark, hence its address space is at least as
+# large as the file.  Dolmen limits its own memory use with `-s 4G`.
+tool_limits = {
+    "klhm": {"concurrency": 1, "timeout": 60 * 60},
+    "dolmen": {"concurrency": 2, "timeout": 30 * 60, "memory": 6 * GB},
+    "tar": {"retries": 2},
+    "gunzip": {"retries": 2},
+    "unzip": {"retries": 2},
+}
+
+
+class ToolTimeout(Exception):
+    pass
+
+
+def limit_memory(memory):
+    """
+    Returns a function for `preexec_fn` that limits the address space of
+    the child process.
+    """
+    if not memory:
+        return None
+
+    def set_limit():
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+
+    return set_limit
+
+
+class Executor:
+    """
+    Runs tools with the limits in `tool_limits`, which can be overridden
+    per tool by `limits`, e.g., `{"klhm": {"timeout": 600}}`.  The
+    concurrency limits apply to all runs started through the same executor.
+    An executor must only be used from a single event loop.
+    """
+
+    def __init__(self, limits=None):
+        self.limits = {}
+        for tool in set(tool_limits) | set(limits or {}):
+            self.limits[tool] = dict(default_limits)
+            self.limits[tool].update(tool_limits.get(tool, {}))
+            self.limits[tool].update((limits or {}).get(tool, {}))
+        self.semaphores = {}
+
+    def get_limits(self, tool):
+        return self.limits.get(tool, default_limits)
+
+    def semaphore(self, tool):
+        if not tool in self.semaphores:
+            concurrency = self.get_limits(tool)["concurrency"]
+            self.semaphores[tool] = asyncio.Semaphore(concurrency)
+        return self.semaphores[tool]
+
+    async def start(self, tool, args, **kwargs):
+        """
+        Starts a long running process of the tool.  Only the memory limit
+        applies.  The keyword arguments are passed to
+        `asyncio.create_subprocess_exec`.
+        """
+        memory = self.get_limits(tool)["memory"]
+        return await asyncio.create_subprocess_exec(
+            *args, preexec_fn=limit_memory(memory), **kwargs
+        )
+
+    async def run_once(self, tool, args, input, stdout, stderr, cwd, check):
+        limits = self.get_limits(tool)
+        async with self.semaphore(tool):
+            process = await self.start(
+                tool,
+                args,
+                stdin=subprocess.PIPE if input != None else subprocess.DEVNULL,
+                stdout=stdout,
+                stderr=stderr,
+                cwd=cwd,
+            )
+            try:
+                out, err = await asyncio.wait_for(
+                    process.communicate(input), limits["timeout"]
+                )
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise ToolTimeout(
+                    f"{tool} exceeded its time limit of {limits['timeout']} seconds."
+                )
+            except asyncio.CancelledError:
+                process.kill()
+                await process.wait()
+                raise
+        if check and process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, args, out, err)
+        return subprocess.CompletedProcess(args, process.returncode, out, err)
+
+    async def run(
+        self,
+        tool,
+        args,
+        input=None,
+        stdout=None,
+        stderr=None,
+        cwd=None,
+        check=False,
+    ):
+        """
+        Runs the tool to completion and returns a
+        `subprocess.CompletedProcess`.  `stdout` and `stderr` are as for
+        `subprocess.run`.  Output is returned as bytes.  Raises `ToolTimeout`,
+        `subprocess.CalledProcessError`, or `OSError` if the last attempt
+        fails.
+        """
+        limits = self.get_limits(tool)
+        attempt = 0
+        while True:
+            try:
+                return await self.run_once(
+                    tool, args, input, stdout, stderr, cwd, check
+                )
+            except (ToolTimeout, subprocess.CalledProcessError, OSError) as e:
+                if attempt >= limits["retries"]:
+                    raise
+                delay = limits["backoff"] * 2**attempt
+                print(f"WARNING: {tool} failed ({e}), retrying in {delay}s.")
+                await asyncio.sleep(delay)
+                attempt = attempt + 1
+
+
+def run_tool(tool, args, limits=None, **kwargs):
+    """
+    Runs a single tool from synchronous code.  The keyword arguments are
+    passed to `Executor.run`.
+    """
+    return asyncio.run(Executor(limits).run(tool, args, **kwargs))
+
+
+def parse_limit_options(timeouts, memories):
+    """
+    Builds the `limits` argument of `Executor` from command line options of
+    the form TOOL=SECONDS and TOOL=GB.
+    """
+    limits = {}
+    for option, key, scale in [(timeouts, "timeout", 1), (memories, "memory", GB)]:
+        for entry in option or []:
+            tool, value = entry.split("=")
+            limits.setdefault(tool, {})[key] = float(value) * scale
+    for entry in limits.values():
+        if "memory" in entry:
+            entry["memory"] = int(entry["memory"])
+    return limits
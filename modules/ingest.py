@@ -0,0 +1,451 @@
+"""
+Infrastructure for adding many benchmarks at once.
+
+The expensive analysis of benchmark files runs in worker processes.  The
+finished records are put on a queue, and a single writer thread inserts
+them into the database.  Hence, there is never more than one writer and
+no time is lost waiting for the database lock.
+"""
+
+import os
+import time
+import json
+import asyncio
+import queue
+import sqlite3
+import tarfile
+import threading
+import subprocess
+from pathlib import PurePosixPath
+
+from modules import benchmarks, manifest, dolmen, executor, database
+
+# Configuration of a worker process.  Set by `init_worker`.
+worker = {}
+
+
+def init_worker(
+    dolmenPath, dolmenCacheFile=None, dolmenVersion=None, limits=None, claims=None
+):
+    """
+    Initializer for the worker processes of a `multiprocessing.Pool`.
+    Each worker has its own event loop and `executor.Executor` (`limits`
+    override the default limits of the tools), keeps one klhm process in
+    batch mode, and its own connection to the Dolmen cache, if there is one.
+    `claims` is a dictionary shared by all workers (a `multiprocessing`
+    manager dict) that maps content hashes to the manifest key of the file
+    that is analyzed for this content.
+    """
+    worker["loop"] = asyncio.new_event_loop()
+    asyncio.set_event_loop(worker["loop"])
+    worker["dolmenPath"] = dolmenPath
+    worker["claims"] = claims
+    worker["executor"] = executor.Executor(limits)
+    worker["klhm"] = benchmarks.KlhmProcess(worker["executor"])
+    worker["dolmenCache"] = None
+    if dolmenCacheFile:
+        worker["dolmenCache"] = dolmen.DolmenCache(dolmenCacheFile, dolmenVersion)
+
+
+def read_archive(archive):
+    """
+    Yields the `.smt2` members of a `.tar.zst` release archive as tuples
+    (path, member), where path is the member name as `PurePosixPath`, and
+    member is a tuple (archive, size, mtime, read).  Calling `read()`
+    returns the content of the member.  The archive is decompressed by
+    `zstd` into a pipe and read as a tar stream, hence nothing is unpacked
+    to disk, and `read` must be called before the next member is requested.
+    """
+    process = subprocess.Popen(["zstd", "-dcq", str(archive)], stdout=subprocess.PIPE)
+    try:
+        with tarfile.open(fileobj=process.stdout, mode="r|") as tar:
+            for info in tar:
+                if not info.isfile() or not info.name.endswith(".smt2"):
+                    continue
+
+                def read(info=info):
+                    return tar.extractfile(info).read()
+
+                member = (str(archive), info.size, int(info.mtime) * 10**9, read)
+                yield PurePosixPath(info.name), member
+    except BaseException:
+        process.kill()
+        raise
+    finally:
+        process.stdout.close()
+        process.wait()
+    if process.returncode != 0:
+        raise Exception(f"Could not decompress {archive}.")
+
+
+def analyze_job(job):
+    """
+    Analyzes one benchmark file in a worker process.  The job is a triple
+    of the benchmark path, the content hash recorded in the manifest, or
+    None, and the content of an archive member, or None.  The content is
+    a tuple (archive, data, mtime).  If the content did not change, the
+    analysis is skipped and a "touch" record is returned.  If another file
+    with the same content is (or was) analyzed, a "copy" record is
+    returned, and the writer copies the analysis of that file.  Returns a pair
+    (record, error message).  The record contains the start time of the
+    job and the durations of its stages under "timings".
+    """
+    benchmark, knownHash, content = job
+    memfd = None
+    start = time.time()
+    try:
+        record = {
+            "action": "add",
+            "path": str(benchmark),
+            "key": manifest.manifest_key(benchmark),
+            "start": start,
+        }
+        source = benchmark
+        if content:
+            archive, data, record["mtime"] = content
+            record["path"] = f"{archive}:{benchmark}"
+            record["size"] = len(data)
+            record["contentHash"] = manifest.content_hash_data(data)
+        else:
+            stat = os.stat(benchmark)
+            record["size"] = stat.st_size
+            record["mtime"] = stat.st_mtime_ns
+            record["contentHash"] = manifest.content_hash(benchmark)
+        timings = {"hash": time.time() - start}
+        if record["contentHash"] == knownHash:
+            if worker["claims"] != None:
+                # The benchmark of the file is kept.
+                worker["claims"].setdefault(record["contentHash"], record["key"])
+            record["action"] = "touch"
+            record["timings"] = timings
+            return record, None
+        if worker["claims"] != None:
+            owner = worker["claims"].setdefault(record["contentHash"], record["key"])
+            if owner != record["key"]:
+                _, _, familyFolder, fileName = benchmarks.parse_benchmark_path(
+                    benchmark
+                )
+                record["action"] = "copy"
+                record["familyFolder"] = familyFolder
+                record["fileName"] = fileName
+                record["timings"] = timings
+                return record, None
+        if content:
+            # The tools are handed an anonymous in-memory file.  The path
+            # via /proc works for the long running klhm process too, which
+            # does not inherit file descriptors opened later.
+            memfd = os.memfd_create(benchmark.name)
+            with open(memfd, "wb", closefd=False) as f:
+                f.write(data)
+            source = f"/proc/{os.getpid()}/fd/{memfd}"
+        dolmenResults = None
+        if worker["dolmenCache"]:
+            dolmenResults = worker["dolmenCache"].get(record["contentHash"])
+        record["dolmenCached"] = dolmenResults != None
+        analysis = benchmarks.analyze_benchmark(
+            benchmark,
+            worker["dolmenPath"],
+            worker["executor"],
+            worker["klhm"],
+            dolmenResults,
+            source,
+        )
+        path = record["path"]
+        record.update(worker["loop"].run_until_complete(analysis))
+        record["path"] = path
+        timings.update(record["timings"])
+        timings["analysis"] = time.time() - start
+        record["timings"] = timings
+        return record, None
+    except Exception as e:
+        return None, f"{benchmark}: {e}"
+    finally:
+        if memfd != None:
+            os.close(memfd)
+
+
+def stats_entry(record, writeTime):
+    """
+    Returns the line of the statistics log for a record written by the
+    `BenchmarkWriter`.  All durations are in seconds.
+    """
+    entry = {
+        "time": time.time(),
+        "action": record["action"],
+        "key": record["key"],
+        "write": writeTime,
+    }
+    if record["action"] != "remove":
+        entry["start"] = record["start"]
+        entry["bytes"] = record["size"]
+        entry.update(record["timings"])
+    if record["action"] == "add":
+        entry["queries"] = len(record["queries"])
+        entry["dolmenCached"] = record["dolmenCached"]
+    return entry
+
+
+def write_record(connection, record, context, dolmenCache=None):
+    """
+    Applies a record produced by `analyze_job` to the database.  For "copy"
+    records, "source" must be the id of a benchmark with the same content.
+    Does not commit.  Returns the id of the added benchmark, if any.
+    """
+    key = record["key"]
+    if record["action"] == "remove":
+        print(f"Removing {key}")
+        manifest.remove_entry(connection, key)
+    elif record["action"] == "touch":
+        manifest.touch_entry(connection, key, record["size"], record["mtime"])
+    else:
+        print(f"Adding {record['path']}")
+        oldId = manifest.get_benchmark_id(connection, key)
+        if oldId:
+            benchmarks.delete_benchmark(connection, oldId)
+        if record["action"] == "copy":
+            benchmarkId = benchmarks.copy_benchmark(
+                connection, record["source"], record, context
+            )
+        else:
+            try:
+                benchmarkId = benchmarks.insert_benchmark(connection, record, context)
+            finally:
+                record["queries"].discard()
+        # The manifest entry is written in the same transaction as the
+        # benchmark.  Hence, it marks the file as completed.
+        manifest.write_entry(
+            connection,
+            key,
+            record["size"],
+            record["mtime"],
+            record["contentHash"],
+            benchmarkId,
+        )
+        if dolmenCache and record["action"] == "add" and not record["dolmenCached"]:
+            dolmenCache.put(
+                record["contentHash"],
+                record["passesDolmen"],
+                record["passesDolmenStrict"],
+            )
+        return benchmarkId
+
+
+def add_benchmark(dbFile, benchmark, dolmenPath):
+    """
+    Analyzes a single benchmark and adds it to the database.
+    """
+    init_worker(dolmenPath)
+    record, error = analyze_job((benchmark, None, None))
+    worker["loop"].run_until_complete(worker["klhm"].close())
+    if error:
+        raise Exception(error)
+
+    # Several instances of `addbenchmark.py` might run at the same time.  The
+    # write lock is taken before the families and logics are read, such that
+    # no other instance inserts them in between.
+    connection = database.connect_bulk(dbFile, exclusive=False)
+    connection.execute("BEGIN IMMEDIATE")
+    write_record(connection, record, benchmarks.IngestContext(connection))
+    connection.commit()
+    connection.close()
+
+
+class BenchmarkWriter(threading.Thread):
+    """
+    Thread that owns the database connection during ingestion.
+
+    Records produced by `analyze_job` are added with `put`.  Depending on
+    the "action" of a record, the benchmark is added (replacing the
+    benchmark previously built from the same file), only its manifest entry
+    is updated ("touch"), it is removed ("remove"), or the benchmark that
+    was added for the same content is copied ("copy").  Copies wait until
+    that benchmark is written.  The thread commits
+    after `batchSize` records, or when the oldest uncommitted record is
+    older than `batchSeconds`, whichever comes first.  Call `close` to
+    commit the last batch and stop the thread.  A record that cannot be
+    written is rolled back on its own and counted in `failures`.
+
+    If `statsFile` is given, one JSON line per record with the durations of
+    its stages (see `stats_entry`), and one line per commit are appended to
+    it.  `ingeststats.py` summarizes this log.
+    """
+
+    def __init__(
+        self,
+        dbFile,
+        batchSize=100,
+        batchSeconds=10.0,
+        dolmenCacheFile=None,
+        dolmenVersion=None,
+        statsFile=None,
+    ):
+        super().__init__(name="BenchmarkWriter")
+        self.dbFile = dbFile
+        self.statsFile = statsFile
+        self.statsLog = None
+        self.dolmenCacheFile = dolmenCacheFile
+        self.dolmenVersion = dolmenVersion
+        self.dolmenCache = None
+        self.context = None
+        self.batchSize = batchSize
+        self.batchSeconds = batchSeconds
+        # Bounded, such that the workers cannot run arbitrarily far ahead
+        # of the writer.
+        self.queue = queue.Queue(maxsize=4 * batchSize)
+        self.written = 0
+        self.failures = 0
+        self.error = None
+        # Content hash to id of a benchmark with this content.
+        self.originals = {}
+        # Content hash to the "copy" records waiting for the benchmark with
+        # this content.
+        self.waiting = {}
+
+    def put(self, record):
+        self.queue.put(record)
+
+    def close(self):
+        self.queue.put(None)
+        self.join()
+        if self.error:
+            raise self.error
+
+    def find_original(self, connection, contentHash):
+        benchmarkId = self.originals.get(contentHash)
+        if benchmarkId:
+            # The content hash is checked, since the id of a benchmark that
+            # was replaced during this run can be reused.
+            for row in connection.execute(
+                "SELECT id FROM Benchmarks WHERE id=? AND contentHash=?",
+                (benchmarkId, contentHash),
+            ):
+                return benchmarkId
+            # Replaced or removed during this run.
+            benchmarkId = benchmarks.find_benchmark_by_hash(connection, contentHash)
+            self.originals[contentHash] = benchmarkId
+        return benchmarkId
+
+    def write(self, connection, record):
+        """
+        Writes one record inside a savepoint, such that a failing record
+        leaves no partial rows behind.  Once a benchmark is added, the
+        copies waiting for it are written too.
+        """
+        if record["action"] == "copy":
+            record["source"] = self.find_original(connection, record["contentHash"])
+            if not record["source"]:
+                self.waiting.setdefault(record["contentHash"], []).append(record)
+                return
+        writeStart = time.monotonic()
+        if not connection.in_transaction:
+            # Otherwise releasing the savepoint would commit.
+            connection.execute("BEGIN")
+        connection.execute("SAVEPOINT record")
+        try:
+            benchmarkId = write_record(
+                connection, record, self.context, self.dolmenCache
+            )
+        except sqlite3.OperationalError:
+            raise
+        except Exception as e:
+            connection.execute("ROLLBACK TO record")
+            connection.execute("RELEASE record")
+            # The context might contain a family that was rolled back.
+            self.context = benchmarks.IngestContext(connection)
+            print(f"ERROR: {record.get('path', record['key'])}: {e}")
+            self.failures = self.failures + 1
+            return
+        connection.execute("RELEASE record")
+        if self.statsLog:
+            entry = stats_entry(record, time.monotonic() - writeStart)
+            self.statsLog.write(json.dumps(entry) + "\n")
+        if record["action"] == "add":
+            self.originals[record["contentHash"]] = benchmarkId
+            for copy in self.waiting.pop(record["contentHash"], []):
+                self.write(connection, copy)
+
+    def setup(self, connection):
+        """
+        Reads the state of the writer from the database and opens its files.
+        """
+        self.context = benchmarks.IngestContext(connection)
+        if self.dolmenCacheFile:
+            self.dolmenCache = dolmen.DolmenCache(
+                self.dolmenCacheFile, self.dolmenVersion
+            )
+        if self.statsFile:
+            self.statsLog = open(self.statsFile, "a")
+        for row in connection.execute("SELECT contentHash, benchmark FROM Manifest"):
+            self.originals[row[0]] = row[1]
+
+    def run(self):
+        connection = None
+        try:
+            # sqlite3 connections can only be used by the thread that created
+            # them.
+            connection = database.connect_bulk(self.dbFile)
+            self.setup(connection)
+        except Exception as e:
+            # As for errors of the database below, the queue is drained and
+            # the error is raised again by `close`.
+            self.error = e
+
+        pending = 0
+        batchStart = None
+        while True:
+            timeout = None
+            if pending > 0:
+                timeout = max(0.0, batchStart + self.batchSeconds - time.monotonic())
+            try:
+                record = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                record = False
+
+            if record and self.error and record["action"] == "add":
+                record["queries"].discard()
+            if record and not self.error:
+                try:
+                    self.write(connection, record)
+                    if pending == 0:
+                        batchStart = time.monotonic()
+                    pending = pending + 1
+                except Exception as e:
+                    # The database itself failed.  Keep draining the queue,
+                    # such that producers do not block.  The error is raised
+                    # again by `close`.
+                    self.error = e
+                    connection.rollback()
+                    pending = 0
+
+            if pending > 0 and (
+                record is None
+                or pending >= self.batchSize
+                or time.monotonic() - batchStart >= self.batchSeconds
+            ):
+                commitStart = time.monotonic()
+                connection.commit()
+                if self.dolmenCache:
+                    self.dolmenCache.commit()
+                if self.statsLog:
+                    entry = {
+                        "time": time.time(),
+                        "action": "commit",
+                        "records": pending,
+                        "commit": time.monotonic() - commitStart,
+                    }
+                    self.statsLog.write(json.dumps(entry) + "\n")
+                self.written = self.written + pending
+                pending = 0
+
+            if record is None:
+                break
+        for copies in self.waiting.values():
+            for copy in copies:
+                print(f"ERROR: {copy['path']}: file with the same content failed.")
+                self.failures = self.failures + 1
+        if connection:
+            connection.close()
+        if self.dolmenCache:
+            self.dolmenCache.close()
+        if self.statsLog:
+            self.statsLog.close()
@@ -1,7 +1,49 @@
+# The bits of the `features` column of the Logics table, in order.  For
+# example, the quantifier-free logics with bit-vectors are the logics that
+# have "bitvectors" but not "quantifiers", see `logic_ids`.
+feature_names = [
+    "quantifiers",
+    "arrays",
+    "uninterpretedFunctions",
+    "bitvectors",
+    "floatingPoint",
+    "dataTypes",
+    "strings",
+    "nonLinear",
+    "difference",
+    "reals",
+    "integers",
+]
+
+
+def feature_mask(*names):
+    mask = 0
+    for name in names:
+        mask = mask | (1 << feature_names.index(name))
+    return mask
+
+
+def logic_ids(connection, required=[], excluded=[]):
+    """
+    Returns the ids of the logics that have all features in `required`
+    and none in `excluded`.
+    """
+    mask = feature_mask(*required, *excluded)
+    return [
+        row[0]
+        for row in connection.execute(
+            "SELECT id FROM Logics WHERE features & ? = ?",
+            (mask, feature_mask(*required)),
+        )
+    ]
+
+
 def setup_logics(connection):
     connection.execute(
         """CREATE TABLE Logics(
-        logic TEXT PRIMARY KEY,
+        id INTEGER PRIMARY KEY,
+        logic TEXT NOT NULL UNIQUE,
+        features INT NOT NULL,
         quantifierFree BOOL,
         arrays BOOL,
         uninterpretedFunctions BOOL,
@@ -62,8 +104,8 @@ class LogicsCollector:
         if logicString[:2] == "DT":
             self.dataTypes = True
             logicString = logicString[2:]
-        if logicString[0:] == "S":
-            self.string = True
+        if logicString[:1] == "S":
+            self.strings = True
             logicString = logicString[1:]
 
         if logicString == "IDL":
@@ -90,10 +132,28 @@ class LogicsCollector:
             self.reals = True
             self.nonLinear = True
 
+    def features(self):
+        """
+        Returns the feature bitmask, see `feature_names`.
+        """
+        mask = 0
+        for i, name in enumerate(feature_names):
+            if name == "quantifiers":
+                present = not self.quantifierFree
+            else:
+                present = getattr(self, name)
+            if present:
+                mask = mask | (1 << i)
+        return mask
+
     def writeToDatabase(self, connection):
-        connection.execute(
+        """
+        Inserts the logic and returns its id.
+        """
+        cursor = connection.execute(
             """INSERT INTO Logics(
             logic,
+            features,
             quantifierFree,
             arrays,
             uninterpretedFunctions,
@@ -105,10 +165,11 @@ class LogicsCollector:
             difference,
             reals,
             integers
-            ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?);
+            ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?);
             """,
             (
                 self.logic,
+                self.features(),
                 self.quantifierFree,
                 self.arrays,
                 self.uninterpretedFunctions,
@@ -122,6 +183,7 @@ class LogicsCollector:
                 self.integers,
             ),
         )
+        return cursor.lastrowid
 
 
 def write_all_logics(connection):
@@ -0,0 +1,231 @@
+"""
+Databases split by logic.
+
+`split_logics.py` splits a database file into one file per logic and a
+file with the tables that are shared by all logics.  The per-logic files
+contain the benchmarks of the logic, and their queries, results, ratings,
+and target solvers.  All ids are kept, hence the ids are unique across the
+files.  The shared file contains everything else, including the symbol
+index (see `modules/symbolindex.py`).  Compact files and read-optimized
+files (see `finalize.py`) can be split.  If the results are clustered
+(`--cluster-results`), the per-logic files contain the table
+ResultsClustered and the view Results.
+
+`connect_logics` opens the shared file and attaches the files of some
+logics.  The per-logic tables are then temporary views (UNION ALL over the
+attached files) with the usual names, hence queries written for the whole
+database work unchanged, but only see the attached logics.
+"""
+
+import re
+import sqlite3
+from pathlib import Path
+
+from modules import database
+
+SHARED_FILE = "shared.sqlite"
+
+# Tables with rows that belong to a logic, in the order they are split.
+logic_tables = ["Benchmarks", "Queries", "Results", "Ratings", "TargetSolvers"]
+
+# The table that holds the results if Results is a view, see
+# `database.cluster_results`.
+CLUSTERED_RESULTS = "ResultsClustered"
+
+# Selects the rows of a table that belong to the logic in the schema
+# `logic`, whose Benchmarks table is already filled.
+logic_conditions = {
+    "Benchmarks": "logic = ?",
+    "Queries": "benchmark IN (SELECT id FROM logic.Benchmarks)",
+    "Results": "query IN (SELECT id FROM logic.Queries)",
+    CLUSTERED_RESULTS: "query IN (SELECT id FROM logic.Queries)",
+    "Ratings": "query IN (SELECT id FROM logic.Queries)",
+    "TargetSolvers": "benchmark IN (SELECT id FROM logic.Benchmarks)",
+}
+
+
+def logic_file(folder, logic):
+    return Path(folder) / f"{logic}.sqlite"
+
+
+def split_tables(connection):
+    """
+    Returns the per-logic tables of the main database, and the (name, sql)
+    pairs of the views that are copied to the per-logic files.  Only the
+    view Results of clustered results is supported.
+    """
+    names = [
+        row[0]
+        for row in connection.execute(
+            "SELECT name FROM main.sqlite_schema WHERE type = 'table'"
+        )
+    ]
+    views = connection.execute(
+        "SELECT name, sql FROM main.sqlite_schema WHERE type = 'view'"
+    ).fetchall()
+    for name, _ in views:
+        if name != "Results" or CLUSTERED_RESULTS not in names:
+            raise Exception(f"The database contains the view {name}.")
+    if views:
+        tables = [CLUSTERED_RESULTS if t == "Results" else t for t in logic_tables]
+        return tables, views
+    return logic_tables, []
+
+
+def create_tables(connection, schema, selected):
+    """
+    Creates the tables in `selected` in the attached database `schema`,
+    with the definitions of the main database.
+    """
+    for name, sql in connection.execute(
+        """
+        SELECT name, sql FROM main.sqlite_schema
+        WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+        """
+    ).fetchall():
+        if name in selected:
+            sql = re.sub(
+                rf'^CREATE TABLE\s+"?{name}"?', f"CREATE TABLE {schema}.{name}", sql
+            )
+            connection.execute(sql)
+
+
+def create_read_indexes(connection, schema):
+    """
+    Creates those indexes of `database.read_indexes` whose table is in the
+    attached database `schema`.
+    """
+    tables = [
+        row[0]
+        for row in connection.execute(
+            f"SELECT name FROM {schema}.sqlite_schema WHERE type = 'table'"
+        )
+    ]
+    indexes = database.read_indexes + database.clustered_result_indexes
+    for name, definition in indexes:
+        if definition.split("(")[0] in tables:
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {schema}.{name} ON {definition}"
+            )
+
+
+def finish_file(connection, schema, withIndexes):
+    if withIndexes:
+        create_read_indexes(connection, schema)
+    connection.commit()
+    connection.execute(f"ANALYZE {schema}")
+    connection.commit()
+    connection.execute(f"DETACH DATABASE {schema}")
+
+
+def split_logics(connection, folder, logics=None, withIndexes=True):
+    """
+    Writes the per-logic files of the main database to `folder`, for the
+    given logics or all logics with benchmarks, and the shared file.
+    Existing files are replaced.  With `withIndexes`, the files get the
+    indexes of the read-optimized database.
+    """
+    selected, views = split_tables(connection)
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    if logics == None:
+        logics = [
+            row[0]
+            for row in connection.execute(
+                """
+                SELECT logic FROM Logics
+                WHERE id IN (SELECT logic FROM Benchmarks) ORDER BY logic
+                """
+            )
+        ]
+
+    for logic in logics:
+        logicId = None
+        for row in connection.execute("SELECT id FROM Logics WHERE logic=?", (logic,)):
+            logicId = row[0]
+        if logicId == None:
+            raise Exception(f"Unknown logic {logic}.")
+        print(f"Writing {logic}")
+        path = logic_file(folder, logic)
+        path.unlink(missing_ok=True)
+        connection.execute("ATTACH DATABASE ? AS logic", (str(path),))
+        create_tables(connection, "logic", selected)
+        for table in selected:
+            parameters = (logicId,) if table == "Benchmarks" else ()
+            connection.execute(
+                f"""
+                INSERT INTO logic.{table}
+                SELECT * FROM main.{table} WHERE {logic_conditions[table]}
+                """,
+                parameters,
+            )
+        for name, sql in views:
+            connection.execute(
+                re.sub(rf'^CREATE VIEW\s+"?{name}"?', f"CREATE VIEW logic.{name}", sql)
+            )
+        finish_file(connection, "logic", withIndexes)
+
+    print("Writing the shared tables")
+    path = folder / SHARED_FILE
+    path.unlink(missing_ok=True)
+    connection.execute("ATTACH DATABASE ? AS shared", (str(path),))
+    tables = [
+        row[0]
+        for row in connection.execute(
+            """
+            SELECT name FROM main.sqlite_schema
+            WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+            """
+        )
+        if row[0] not in selected
+    ]
+    create_tables(connection, "shared", tables)
+    for table in tables:
+        connection.execute(f"INSERT INTO shared.{table} SELECT * FROM main.{table}")
+    finish_file(connection, "shared", withIndexes)
+
+
+def available_logics(folder):
+    """
+    Returns the logics that have a file in `folder`.
+    """
+    return sorted(
+        p.stem for p in Path(folder).glob("*.sqlite") if p.name != SHARED_FILE
+    )
+
+
+def connect_logics(folder, logics=None):
+    """
+    Opens the split database in `folder` with the given logics (all by
+    default).  The connection is read-only.  At most
+    `SQLITE_LIMIT_ATTACHED` logics (10 by default) can be opened at once.
+    """
+    if logics == None:
+        logics = available_logics(folder)
+    if not logics:
+        raise Exception(f"{folder}: no logics to open.")
+    connection = database.connect_read(Path(folder) / SHARED_FILE)
+    limit = connection.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    if len(logics) > limit:
+        raise Exception(f"At most {limit} logics can be opened at once.")
+    schemas = []
+    for i, logic in enumerate(logics):
+        path = logic_file(folder, logic)
+        if not path.exists():
+            raise Exception(f"{path}: there is no file for {logic}.")
+        schema = f"logic{i}"
+        connection.execute(
+            f"ATTACH DATABASE ? AS {schema}",
+            (path.resolve().as_uri() + "?immutable=1",),
+        )
+        schemas.append(schema)
+    tables = logic_tables
+    for row in connection.execute(
+        f"SELECT name FROM {schemas[0]}.sqlite_schema WHERE name = ?",
+        (CLUSTERED_RESULTS,),
+    ):
+        tables = tables + [CLUSTERED_RESULTS]
+    for table in tables:
+        union = " UNION ALL ".join(f"SELECT * FROM {s}.{table}" for s in schemas)
+        connection.execute(f"CREATE TEMP VIEW {table} AS {union}")
+    return connection
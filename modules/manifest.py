@@ -0,0 +1,139 @@
+"""
+The manifest records which benchmark file each row in the Benchmarks table
+was built from.  It stores size, modification time and a content hash per
+file, such that a rebuild only needs to analyze files that changed.
+"""
+
+import hashlib
+
+from modules import benchmarks
+
+
+def setup_manifest(connection):
+    # path is the path of the file starting at the 'incremental' or
+    # 'non-incremental' folder.  Hence, it does not depend on where the
+    # benchmark library is stored.
+    connection.execute(
+        """CREATE TABLE Manifest(
+        path TEXT PRIMARY KEY,
+        size INT NOT NULL,
+        mtime INT NOT NULL,
+        contentHash TEXT NOT NULL,
+        benchmark INT,
+        FOREIGN KEY(benchmark) REFERENCES Benchmarks(id)
+    );"""
+    )
+    connection.commit()
+
+
+def manifest_key(benchmark):
+    """
+    Returns the path used to identify a benchmark file in the manifest.
+    """
+    isIncremental, logic, familyFolder, fileName = benchmarks.parse_benchmark_path(
+        benchmark
+    )
+    track = "incremental" if isIncremental else "non-incremental"
+    return f"{track}/{logic}/{familyFolder}/{fileName}"
+
+
+def content_hash(benchmark):
+    """
+    SHA-256 hash of the content of a benchmark file as hex string.
+    """
+    sha = hashlib.sha256()
+    with open(benchmark, "rb") as f:
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                break
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def content_hash_data(data):
+    """
+    Same as `content_hash`, but for the content of a file as bytes.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def load_manifest(connection):
+    """
+    Returns a dictionary that maps manifest paths to (size, mtime,
+    contentHash).
+    """
+    manifest = {}
+    for row in connection.execute(
+        "SELECT path, size, mtime, contentHash FROM Manifest"
+    ):
+        manifest[row[0]] = (row[1], row[2], row[3])
+    return manifest
+
+
+def get_benchmark_id(connection, key):
+    for row in connection.execute(
+        "SELECT benchmark FROM Manifest WHERE path=?", (key,)
+    ):
+        return row[0]
+    return None
+
+
+def write_entry(connection, key, size, mtime, contentHash, benchmarkId):
+    connection.execute(
+        """
+        INSERT OR REPLACE INTO Manifest(path, size, mtime, contentHash, benchmark)
+        VALUES(?,?,?,?,?);
+        """,
+        (key, size, mtime, contentHash, benchmarkId),
+    )
+
+
+def touch_entry(connection, key, size, mtime):
+    """
+    Updates size and modification time of a file whose content did not
+    change.
+    """
+    connection.execute(
+        "UPDATE Manifest SET size=?, mtime=? WHERE path=?", (size, mtime, key)
+    )
+
+
+def remove_orphans(connection):
+    """
+    Removes benchmarks that are not recorded in the manifest, e.g., because
+    they were written by an interrupted run that did not commit its
+    manifest entries, and queries whose benchmark does not exist.  Returns
+    the number of removed benchmarks.
+    """
+    orphans = connection.execute(
+        """
+        SELECT id FROM Benchmarks
+        WHERE id NOT IN (SELECT benchmark FROM Manifest WHERE benchmark IS NOT NULL)
+        """
+    ).fetchall()
+    for row in orphans:
+        benchmarks.delete_benchmark(connection, row[0])
+    for table in ["Results", "Ratings"]:
+        connection.execute(
+            f"""
+            DELETE FROM {table}
+            WHERE query IN (SELECT id FROM Queries
+                            WHERE benchmark NOT IN (SELECT id FROM Benchmarks))
+            """
+        )
+    connection.execute(
+        "DELETE FROM Queries WHERE benchmark NOT IN (SELECT id FROM Benchmarks)"
+    )
+    return len(orphans)
+
+
+def remove_entry(connection, key):
+    """
+    Removes a file from the manifest together with the benchmark that was
+    built from it.
+    """
+    benchmarkId = get_benchmark_id(connection, key)
+    if benchmarkId:
+        benchmarks.delete_benchmark(connection, benchmarkId)
+    connection.execute("DELETE FROM Manifest WHERE path=?", (key,))
@@ -0,0 +1,167 @@
+"""
+Sharded builds: the benchmark library is split into a fixed number of
+shards, each shard is ingested into its own database file (possibly on a
+different host), and the shard files are merged afterwards.
+
+Every shard file must be created by `prepopulate.py` from the same
+revision, such that the static tables (licenses, solvers, symbols) are
+identical.  Evaluations are added by `postprocess.py` after merging.
+"""
+
+import sqlite3
+import hashlib
+
+from modules import benchmarks
+
+# Tables with static data that must be the same in all shards.
+static_tables = ["Licenses", "Statuses", "Solvers", "SolverVariants", "Symbols"]
+
+# Tables filled by `postprocess.py`.  They must be empty in the shards.
+evaluation_tables = ["Evaluations", "Results", "Ratings"]
+
+
+def parse_shard(shard):
+    """
+    Parses a shard given as "K/N", with 1 <= K <= N, and returns (K, N).
+    """
+    index, count = shard.split("/")
+    index, count = int(index), int(count)
+    if count < 1 or index < 1 or index > count:
+        raise ValueError(f"Invalid shard {shard}.")
+    return index, count
+
+
+def shard_of(benchmark, count, by="path"):
+    """
+    Returns the shard (1 to `count`) a benchmark belongs to.  With
+    `by="path"` the benchmarks are spread evenly, with `by="logic"` all
+    benchmarks of a logic are in the same shard.  The partition only
+    depends on the path within the benchmark library, hence it is the
+    same on all hosts.
+    """
+    isIncremental, logic, familyFolder, fileName = benchmarks.parse_benchmark_path(
+        benchmark
+    )
+    if by == "logic":
+        key = logic
+    else:
+        track = "incremental" if isIncremental else "non-incremental"
+        key = f"{track}/{logic}/{familyFolder}/{fileName}"
+    digest = hashlib.sha256(key.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def copy_table(connection, table, renumber, where="1"):
+    """
+    Copies the rows of `table` that satisfy `where` from the attached shard
+    into the main database.  `renumber` maps column names to the SQL
+    expressions that replace them.  Columns mapped to None are left to their
+    default (e.g., a fresh rowid).
+    """
+    columns = []
+    expressions = []
+    for row in connection.execute(f"PRAGMA main.table_info({table})"):
+        column = row[1]
+        expression = renumber.get(column, column)
+        if expression:
+            columns.append(column)
+            expressions.append(expression)
+    connection.execute(
+        f"""
+        INSERT INTO main.{table}({", ".join(columns)})
+        SELECT {", ".join(expressions)} FROM shard.{table} WHERE {where}
+        """
+    )
+
+
+def check_shard(connection, shardFile):
+    for table in static_tables:
+        for a, b in [("main", "shard"), ("shard", "main")]:
+            for row in connection.execute(
+                f"SELECT * FROM {a}.{table} EXCEPT SELECT * FROM {b}.{table} LIMIT 1"
+            ):
+                raise Exception(f"{shardFile}: {table} differs from the database.")
+    for table in evaluation_tables:
+        for row in connection.execute(f"SELECT 1 FROM shard.{table} LIMIT 1"):
+            raise Exception(f"{shardFile}: merge shards before adding evaluations.")
+
+
+def merge_shard(connection, shardFile):
+    """
+    Adds the benchmarks of a shard file to the database.  Benchmark and
+    query ids are shifted past the ids already in the database, families
+    are identified by their folder name, and logics by their name (a shard
+    can contain logics that are added while ingesting).  Commits.
+    """
+    connection.execute("ATTACH DATABASE ? AS shard", (str(shardFile),))
+    check_shard(connection, shardFile)
+
+    benchmarkOffset = 0
+    for row in connection.execute("SELECT MAX(id) FROM main.Benchmarks"):
+        benchmarkOffset = row[0] or 0
+    queryOffset = 0
+    for row in connection.execute("SELECT MAX(id) FROM main.Queries"):
+        queryOffset = row[0] or 0
+
+    connection.execute(
+        """
+        INSERT INTO main.Families(name, folderName, date, firstOccurrence,
+                                  benchmarkCount)
+        SELECT name, folderName, date, firstOccurrence, benchmarkCount
+        FROM shard.Families
+        WHERE folderName NOT IN (SELECT folderName FROM main.Families)
+        """
+    )
+    copy_table(
+        connection,
+        "Logics",
+        {"id": None},
+        "logic NOT IN (SELECT logic FROM main.Logics)",
+    )
+    connection.execute(
+        """
+        CREATE TEMP TABLE FamilyMap AS
+        SELECT s.id AS shardId, m.id AS mainId
+        FROM shard.Families AS s JOIN main.Families AS m
+        ON s.folderName = m.folderName
+        """
+    )
+    connection.execute(
+        """
+        CREATE TEMP TABLE LogicMap AS
+        SELECT s.id AS shardId, m.id AS mainId
+        FROM shard.Logics AS s JOIN main.Logics AS m
+        ON s.logic = m.logic
+        """
+    )
+
+    copy_table(
+        connection,
+        "Benchmarks",
+        {
+            "id": f"id + {benchmarkOffset}",
+            "family": "(SELECT mainId FROM FamilyMap WHERE shardId = family)",
+            "logic": "(SELECT mainId FROM LogicMap WHERE shardId = logic)",
+        },
+    )
+    copy_table(
+        connection,
+        "Queries",
+        {"id": f"id + {queryOffset}", "benchmark": f"benchmark + {benchmarkOffset}"},
+    )
+    copy_table(
+        connection,
+        "TargetSolvers",
+        {"id": None, "benchmark": f"benchmark + {benchmarkOffset}"},
+    )
+    try:
+        copy_table(
+            connection, "Manifest", {"benchmark": f"benchmark + {benchmarkOffset}"}
+        )
+    except sqlite3.IntegrityError:
+        raise Exception(f"{shardFile}: contains files that are already merged.")
+
+    connection.execute("DROP TABLE temp.FamilyMap")
+    connection.execute("DROP TABLE temp.LogicMap")
+    connection.commit()
+    connection.execute("DETACH DATABASE shard")
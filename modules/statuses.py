@@ -0,0 +1,38 @@
+"""
+The status of queries and results is stored as small integer.  The table
+Statuses maps the codes to their names.  The codes are fixed, such that
+queries can use them directly (e.g., `status IN (1, 2)` for solved).
+"""
+
+UNKNOWN = 0
+SAT = 1
+UNSAT = 2
+
+names = {UNKNOWN: "unknown", SAT: "sat", UNSAT: "unsat"}
+
+
+def setup_statuses(connection):
+    connection.execute(
+        """CREATE TABLE Statuses(
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    );"""
+    )
+    connection.executemany(
+        "INSERT INTO Statuses(id, name) VALUES(?,?);", list(names.items())
+    )
+    connection.commit()
+
+
+def status_code(name):
+    """
+    Returns the code of a status given as text.  Anything but "sat" and
+    "unsat" is unknown.  A missing status stays None.
+    """
+    if name == None:
+        return None
+    if name == "sat":
+        return SAT
+    if name == "unsat":
+        return UNSAT
+    return UNKNOWN
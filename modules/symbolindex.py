@@ -0,0 +1,328 @@
+"""
+Inverted index over the symbol counts of the queries.
+
+For each symbol and count level, the table SymbolPostings stores the set
+of queries that contain the symbol at least that often, as bitmaps over the
+query ids.  The ids are split into blocks of `BLOCK_SIZE` ids, and there is
+one zlib-compressed bitmap per symbol, level, and block (bit `i` of block
+`b` stands for the query with id `b * BLOCK_SIZE + i`).  The levels are 1,
+2, 3, 4, 8, 16, ..., hence thresholds that are levels are answered from the
+bitmaps alone.  For other thresholds, the queries of the next lower level
+are checked against their symbol frequency vectors.  The row with symbol 0
+and level 0 of each block holds all query ids of the block.
+
+Searches are expressions over symbols, for example
+
+    fp.fma AND NOT (str.replace_re OR forall >= 3)
+
+A symbol can be followed by a comparison (`>=`, `>`, `<=`, `<`, `=`, `!=`)
+and a count.  Without a comparison it means `>= 1`.  The operators `AND`,
+`OR`, and `NOT` must be written in upper case, since `and`, `or`, and `not`
+are symbols.  Tokens are separated by white space or parentheses.
+
+The index is built by `postprocess.py`.  Queries added afterwards are not
+found until `build_index` is called again.
+"""
+
+import re
+import zlib
+import sqlite3
+import numpy as np
+
+from modules import symbolvectors
+
+BLOCK_SIZE = 65536
+
+comparisons = [">=", ">", "<=", "<", "=", "!="]
+
+
+def levels(maxCount):
+    """
+    Returns the count levels up to `maxCount`.
+    """
+    result = []
+    level = 1
+    while level <= maxCount:
+        result.append(level)
+        level = level + 1 if level < 4 else level * 2
+    return result
+
+
+def setup_symbol_index(connection):
+    connection.execute(
+        """CREATE TABLE SymbolPostings(
+        symbol INT NOT NULL,
+        level INT NOT NULL,
+        block INT NOT NULL,
+        queries BLOB NOT NULL,
+        PRIMARY KEY(symbol, level, block)
+    ) WITHOUT ROWID;"""
+    )
+
+
+def pack_bitmap(positions):
+    bits = np.zeros(BLOCK_SIZE, dtype=bool)
+    bits[positions] = True
+    return zlib.compress(np.packbits(bits, bitorder="little").tobytes())
+
+
+def unpack_bitmap(blob):
+    """
+    Returns a bitmap as Python integer, such that the set operations are
+    the integer operations `&`, `|`, and `~`.
+    """
+    return int.from_bytes(zlib.decompress(blob), "little")
+
+
+def bitmap_positions(bitmap):
+    data = np.frombuffer(bitmap.to_bytes(BLOCK_SIZE // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(data, bitorder="little"))
+
+
+def write_block(connection, block, queries, occurrences):
+    """
+    Writes the bitmaps of one block.  `queries` are the positions of all
+    queries in the block, and `occurrences` is a list of (position, symbol
+    ids, counts) triples, one for each query with symbols.
+    """
+    rows = [(0, 0, block, pack_bitmap(queries))]
+    if occurrences:
+        positions = np.concatenate(
+            [np.full(len(symbols), p) for p, symbols, _ in occurrences]
+        )
+        symbols = np.concatenate([symbols for _, symbols, _ in occurrences])
+        counts = np.concatenate([counts for _, _, counts in occurrences])
+        for level in levels(int(counts.max())):
+            selected = counts >= level
+            order = np.argsort(symbols[selected], kind="stable")
+            levelSymbols = symbols[selected][order]
+            levelPositions = positions[selected][order]
+            ids, starts = np.unique(levelSymbols, return_index=True)
+            for symbol, group in zip(ids, np.split(levelPositions, starts[1:])):
+                rows.append((int(symbol), level, block, pack_bitmap(group)))
+    connection.executemany(
+        "INSERT INTO SymbolPostings(symbol, level, block, queries) VALUES(?,?,?,?)",
+        rows,
+    )
+
+
+def build_index(connection):
+    """
+    (Re)builds the index from the symbol frequency vectors of all queries.
+    Does not commit.
+    """
+    connection.execute("DROP TABLE IF EXISTS SymbolPostings")
+    setup_symbol_index(connection)
+    block = None
+    queries = []
+    occurrences = []
+    cursor = connection.execute("SELECT id, symbolFrequency FROM Queries ORDER BY id")
+    for queryId, blob in cursor:
+        if queryId // BLOCK_SIZE != block:
+            if block != None:
+                write_block(connection, block, queries, occurrences)
+            block = queryId // BLOCK_SIZE
+            queries = []
+            occurrences = []
+        position = queryId % BLOCK_SIZE
+        queries.append(position)
+        if blob:
+            vector = np.frombuffer(zlib.decompress(blob), dtype="<u4")
+            nonzero = np.flatnonzero(vector)
+            occurrences.append((position, nonzero + 1, vector[nonzero]))
+    if block != None:
+        write_block(connection, block, queries, occurrences)
+
+
+def tokenize(expression):
+    return re.findall(r"\(|\)|[^\s()]+", expression)
+
+
+def parse(expression, symbolIds):
+    """
+    Parses a search expression into a tree of tuples: ("or", a, b),
+    ("and", a, b), ("not", a), and ("count", symbol id, comparison,
+    count).  `symbolIds` maps symbol names to ids.  Raises ValueError if
+    the expression is malformed.
+    """
+    tokens = tokenize(expression)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        token = peek()
+        if token == None:
+            raise ValueError("Unexpected end of the expression.")
+        position = position + 1
+        return token
+
+    def parse_or():
+        node = parse_and()
+        while peek() == "OR":
+            take()
+            node = ("or", node, parse_and())
+        return node
+
+    def parse_and():
+        node = parse_not()
+        while peek() == "AND":
+            take()
+            node = ("and", node, parse_not())
+        return node
+
+    def parse_not():
+        token = take()
+        if token == "NOT":
+            return ("not", parse_not())
+        if token == "(":
+            node = parse_or()
+            if take() != ")":
+                raise ValueError("Expected ')'.")
+            return node
+        if token not in symbolIds:
+            raise ValueError(f"Unknown symbol '{token}'.")
+        if (
+            peek() in comparisons
+            and position + 1 < len(tokens)
+            and tokens[position + 1].isdigit()
+        ):
+            comparison = take()
+            return ("count", symbolIds[token], comparison, int(take()))
+        return ("count", symbolIds[token], ">=", 1)
+
+    if not tokens:
+        raise ValueError("The expression is empty.")
+    node = parse_or()
+    if peek() != None:
+        raise ValueError(f"Unexpected '{peek()}'.")
+    return node
+
+
+class MissingIndexError(Exception):
+    pass
+
+
+class SymbolIndex:
+    """
+    Answers searches with the SymbolPostings table.  Bitmaps are cached,
+    hence an instance should not outlive changes to the database.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.symbolIds = {}
+        for id, name in connection.execute("SELECT id, name FROM Symbols"):
+            self.symbolIds[name] = id
+        try:
+            self.blocks = [
+                row[0]
+                for row in connection.execute(
+                    "SELECT block FROM SymbolPostings WHERE symbol=0 ORDER BY block"
+                )
+            ]
+        except sqlite3.OperationalError:
+            raise MissingIndexError(
+                "The symbol index is missing, run postprocess.py."
+            )
+        self.bitmaps = {}
+
+    def bitmap(self, symbol, level, block):
+        key = (symbol, level, block)
+        if key not in self.bitmaps:
+            self.bitmaps[key] = 0
+            for row in self.connection.execute(
+                """
+                SELECT queries FROM SymbolPostings
+                WHERE symbol=? AND level=? AND block=?
+                """,
+                key,
+            ):
+                self.bitmaps[key] = unpack_bitmap(row[0])
+        return self.bitmaps[key]
+
+    def check(self, candidates, block, symbol, threshold):
+        """
+        Returns the subset of `candidates` with at least `threshold`
+        occurrences of `symbol`.
+        """
+        matches = []
+        queryIds = [int(p) + block * BLOCK_SIZE for p in bitmap_positions(candidates)]
+        for i in range(0, len(queryIds), 500):
+            chunk = queryIds[i : i + 500]
+            for queryId, blob in self.connection.execute(
+                f"""
+                SELECT id, symbolFrequency FROM Queries
+                WHERE id IN ({",".join("?" * len(chunk))})
+                """,
+                chunk,
+            ):
+                counts = symbolvectors.unpack(blob)
+                if symbol <= len(counts) and counts[symbol - 1] >= threshold:
+                    matches.append(queryId - block * BLOCK_SIZE)
+        return unpack_bitmap(pack_bitmap(matches))
+
+    def at_least(self, symbol, threshold, block):
+        if threshold <= 0:
+            return self.bitmap(0, 0, block)
+        level = levels(threshold)[-1]
+        candidates = self.bitmap(symbol, level, block)
+        if level == threshold or not candidates:
+            return candidates
+        return self.check(candidates, block, symbol, threshold)
+
+    def evaluate(self, node, block):
+        universe = self.bitmap(0, 0, block)
+        if node[0] == "or":
+            return self.evaluate(node[1], block) | self.evaluate(node[2], block)
+        if node[0] == "and":
+            left = self.evaluate(node[1], block)
+            return left & self.evaluate(node[2], block) if left else 0
+        if node[0] == "not":
+            return universe & ~self.evaluate(node[1], block)
+        _, symbol, comparison, count = node
+        if comparison == ">=":
+            return self.at_least(symbol, count, block)
+        if comparison == ">":
+            return self.at_least(symbol, count + 1, block)
+        if comparison == "<":
+            return universe & ~self.at_least(symbol, count, block)
+        if comparison == "<=":
+            return universe & ~self.at_least(symbol, count + 1, block)
+        equal = self.at_least(symbol, count, block) & ~self.at_least(
+            symbol, count + 1, block
+        )
+        if comparison == "=":
+            return equal
+        return universe & ~equal
+
+    def search(self, expression, limit=None):
+        """
+        Returns the ids of the queries that match `expression` in
+        ascending order, at most `limit` of them.
+        """
+        tree = parse(expression, self.symbolIds)
+        result = []
+        for block in self.blocks:
+            positions = bitmap_positions(self.evaluate(tree, block))
+            result.extend(int(p) + block * BLOCK_SIZE for p in positions)
+            if limit != None and len(result) >= limit:
+                return result[0:limit]
+        return result
+
+    def count(self, expression):
+        """
+        Returns the number of queries that match `expression`.
+        """
+        tree = parse(expression, self.symbolIds)
+        return sum(self.evaluate(tree, block).bit_count() for block in self.blocks)
+
+
+def search(connection, expression, limit=None):
+    return SymbolIndex(connection).search(expression, limit)
+
+
+def count(connection, expression):
+    return SymbolIndex(connection).count(expression)
@@ -0,0 +1,68 @@
+"""
+Packed symbol frequency vectors.
+
+The number of occurrences of each symbol in a query is stored in the
+column `Queries.symbolFrequency` as one blob: the counts as little-endian
+unsigned 32-bit integers, in the order of the symbols in
+`klhm/src/smtlib-symbols` (hence, the count of the symbol with id `i` is
+at position `i - 1`), with trailing zeros removed, and compressed with
+zlib.  Since most counts are zero, the blobs are small.
+
+The module only depends on the standard library, since the webapp and the
+static page use it too.
+"""
+
+import sys
+import zlib
+import array
+from collections import namedtuple
+
+SymbolCount = namedtuple("SymbolCount", ["name", "count"])
+
+
+def pack(counts):
+    """
+    Packs a list of symbol counts.
+    """
+    end = len(counts)
+    while end > 0 and counts[end - 1] == 0:
+        end = end - 1
+    vector = array.array("I", counts[0:end])
+    if sys.byteorder == "big":
+        vector.byteswap()
+    return zlib.compress(vector.tobytes())
+
+
+def unpack(blob):
+    """
+    Returns the list of symbol counts.  The list ends with the last symbol
+    that occurs.
+    """
+    vector = array.array("I")
+    if blob:
+        vector.frombytes(zlib.decompress(blob))
+        if sys.byteorder == "big":
+            vector.byteswap()
+    return vector.tolist()
+
+
+def named_counts(blob, names):
+    """
+    Returns the symbols that occur as `SymbolCount` pairs ordered by symbol
+    id.  `names` is the list of symbol names ordered by id, see
+    `symbol_names`.
+    """
+    return [
+        SymbolCount(names[i], count)
+        for i, count in enumerate(unpack(blob))
+        if count > 0
+    ]
+
+
+def symbol_names(connection):
+    """
+    Returns the list of symbol names ordered by id.
+    """
+    return [
+        row[0] for row in connection.execute("SELECT name FROM Symbols ORDER BY id")
+    ]
@@ -1,10 +1,9 @@
 #!/usr/bin/env python3
 
-import sqlite3
 import argparse
 import sys
 from pathlib import Path
-from modules import benchmarks, evaluations
+from modules import benchmarks, evaluations, database, symbolindex
 
 parser = argparse.ArgumentParser(
     prog="populate.py", description="Prepopulates the benchmark database."
@@ -18,7 +17,7 @@ parser.add_argument("SMTEXEC_DB", type=Path)
 parser.add_argument("SMTCOMP_RAW", type=Path)
 args = parser.parse_args()
 
-connection = sqlite3.connect(args.DB_FILE)
+connection = database.connect_bulk(args.DB_FILE)
 
 benchmarks.calculate_benchmark_count(connection)
 evaluations.add_smt_comps(
@@ -38,9 +37,13 @@ connection.execute("create index evalIdx6 on Evaluations(date);")
 
 evaluations.add_eval_summaries(connection)
 
+symbolindex.build_index(connection)
+
 # Drop the indices such that we get a compact version.
 connection.execute("drop index evalIdx4;")
 connection.execute("drop index evalIdx5;")
 connection.execute("drop index evalIdx6;")
 
+# This is the last step of the build.
+database.end_bulk_load(connection)
 connection.close()
@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
 
-import sqlite3
 import argparse
 from pathlib import Path
-from modules import licenses, benchmarks, evaluations, solvers, logics
+from modules import licenses, benchmarks, evaluations, solvers, logics, manifest
+from modules import database, statuses
 
 parser = argparse.ArgumentParser(
     prog="prepopulate.py", description="Prepopulates the benchmark database."
@@ -12,16 +12,15 @@ parser = argparse.ArgumentParser(
 parser.add_argument("DB_FILE", type=Path)
 args = parser.parse_args()
 
-connection = sqlite3.connect(args.DB_FILE)
-
-connection.execute("PRAGMA foreign_keys = ON;")
-connection.execute("PRAGMA journal_mode=wal")
-connection.commit()
+# The whole build uses the bulk-load profile, see `modules/database.py`.
+connection = database.connect_bulk(args.DB_FILE)
 
 licenses.setup_licenses(connection)
+statuses.setup_statuses(connection)
 evaluations.setup_evaluations(connection)
 solvers.setup_solvers(connection)
 benchmarks.setup_benchmarks(connection)
 logics.setup_logics(connection)
 logics.write_all_logics(connection)
+manifest.setup_manifest(connection)
 connection.close()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+
+"""
+Splits a database file into one file per logic and a file with the shared
+tables (see `modules/logicshards.py`).  Use `logicshards.connect_logics`
+to open the files of some logics as one database.
+"""
+
+import sqlite3
+import argparse
+from pathlib import Path
+from modules import database, logicshards
+
+parser = argparse.ArgumentParser(
+    prog="split_logics.py",
+    description="Splits a database file into one file per logic.",
+)
+parser.add_argument("DB_FILE", type=Path)
+parser.add_argument("OUT_DIR", type=Path)
+parser.add_argument(
+    "--logic",
+    action="append",
+    help="only write the file of this logic (can be repeated)",
+)
+parser.add_argument(
+    "--no-indexes",
+    action="store_true",
+    help="do not add the indexes of the read-optimized database",
+)
+args = parser.parse_args()
+
+connection = database.connect_read(args.DB_FILE)
+logicshards.split_logics(connection, args.OUT_DIR, args.logic, not args.no_indexes)
+connection.close()
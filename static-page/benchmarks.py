@@ -2,11 +2,17 @@
 
 import sqlite3
 import os
+import sys
 import argparse
 import polars as pl
 import altair as alt
 from jinja2 import Environment, PackageLoader, select_autoescape
 from rich.progress import track
+from pathlib import Path
+
+# The shared modules are in the parent folder.
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from modules import dbconnect, symbolvectors
 
 
 """
@@ -19,7 +25,11 @@ env = Environment(loader=PackageLoader("logics"), autoescape=select_autoescape()
 def get_queries(cursor, benchmark_id):
     res = cursor.execute(
         """
-           SELECT * FROM Queries WHERE benchmark=? 
+           SELECT q.*, s.name AS statusName, i.name AS inferredStatusName
+           FROM Queries AS q
+           LEFT JOIN Statuses AS s ON s.id = q.status
+           LEFT JOIN Statuses AS i ON i.id = q.inferredStatus
+           WHERE benchmark=?
            ORDER BY idx ASC
            LIMIT 101
            """,
@@ -31,7 +41,7 @@ def get_queries(cursor, benchmark_id):
 def get_benchmark(cursor, benchmark_id):
     for row in cursor.execute(
         """
-        SELECT b.id, b.name, logic, s.folderName, s.date, isIncremental, size,
+        SELECT b.id, b.name, lo.logic, s.folderName, s.date, isIncremental, size,
                b.compressedSize, l.name, l.link, l.spdxIdentifier, generatedOn,
                generatedBy, generator, application, description, category,
                passesDolmen, passesDolmenStrict,
@@ -41,6 +51,7 @@ def get_benchmark(cursor, benchmark_id):
                FROM Benchmarks AS b
                   INNER JOIN Families AS s ON s.Id = b.family
                   INNER JOIN Licenses AS l ON l.Id = b.license
+                  INNER JOIN Logics AS lo ON lo.id = b.logic
         WHERE b.id=?""",
         (benchmark_id,),
     ):
@@ -52,9 +63,11 @@ def get_evaluations(cursor, query_id):
     res = cursor.execute(
         """
         SELECT ev.name, ev.date, ev.link, sol.name AS solverName,
-               sovar.fullName, res.status, res.wallclockTime, res.cpuTime,
-               rat.rating, rat.consideredSolvers, rat.successfulSolvers
+               sovar.fullName, st.name AS status, res.wallclockTime,
+               res.cpuTime, rat.rating, rat.consideredSolvers,
+               rat.successfulSolvers
         FROM Results AS res
+        INNER JOIN Statuses AS st ON res.status = st.id
         INNER JOIN Evaluations AS ev ON res.evaluation = ev.id
         INNER JOIN SolverVariants AS sovar ON res.solverVariant = sovar.id
         INNER JOIN Solvers AS sol ON sovar.solver = sol.id
@@ -71,14 +84,22 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("database")
     parser.add_argument("folder", help="output directory")
+    parser.add_argument(
+        "--duckdb",
+        action="store_true",
+        help="the database is a DuckDB file written by export_duckdb.py "
+        "(needs the duckdb package)",
+    )
     args = parser.parse_args()
 
-    connection = sqlite3.connect(args.database)
+    connection = dbconnect.connect(args.database, args.duckdb)
     connection.row_factory = sqlite3.Row
     connection.execute("PRAGMA cache_size = 10000;")
 
     benchmark_template = env.get_template("benchmark.html")
 
+    symbol_names = symbolvectors.symbol_names(connection)
+
     res = connection.execute(
         """
             SELECT id FROM Benchmarks
@@ -99,14 +120,9 @@ if __name__ == "__main__":
 
         symbols = []
         for query in query_data:
-            res = connection.execute(
-                """
-                SELECT s.name,sc.count FROM SymbolCounts AS sc
-                INNER JOIN Symbols AS s ON s.id = sc.symbol
-                WHERE sc.query=?""",
-                (query["id"],),
+            symbols.append(
+                symbolvectors.named_counts(query["symbolFrequency"], symbol_names)
             )
-            symbols.append(res.fetchall())
 
         print(f"\tWriting benchmark {benchmark_id}")
         benchmark_template.stream(
@@ -9,6 +9,12 @@ from random import Random
 import math
 from jinja2 import Environment, PackageLoader, select_autoescape
 import argparse
+import sys
+from pathlib import Path
+
+# The shared modules are in the parent folder.
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from modules import dbconnect
 
 U = TypeVar("U")
 
@@ -93,8 +99,14 @@ if __name__ == "__main__":
     parser.add_argument("database")
     parser.add_argument("folder")
     parser.add_argument("logic")
+    parser.add_argument(
+        "--duckdb",
+        action="store_true",
+        help="the database is a DuckDB file written by export_duckdb.py "
+        "(needs the duckdb package)",
+    )
     args = parser.parse_args()
-    connection = sqlite3.connect(args.database)
+    connection = dbconnect.connect(args.database, args.duckdb)
     connection.row_factory = sqlite3.Row
 
     logic_name = args.logic
@@ -102,17 +114,20 @@ if __name__ == "__main__":
     df = pl.read_database(
         query="""
         SELECT ev.name, ev.date, ev.link, ev.id as ev_id, sol.name AS solver,
-                   sovar.fullName, res.status, res.cpuTime,
-                   query.id, bench.logic
+                   sovar.fullName, st.name AS status, res.cpuTime,
+                   query.id, lo.logic
             FROM Results AS res
-            INNER JOIN Benchmarks AS bench ON bench.id = query.benchmark
+            INNER JOIN Statuses AS st ON st.id = res.status
             INNER JOIN Queries AS query ON res.query = query.id
+            INNER JOIN Benchmarks AS bench ON bench.id = query.benchmark
+            INNER JOIN Logics AS lo ON lo.id = bench.logic
             INNER JOIN Evaluations AS ev ON res.evaluation = ev.id
             INNER JOIN SolverVariants AS sovar ON res.solverVariant = sovar.id
             INNER JOIN Solvers AS sol ON sovar.solver = sol.id
-            WHERE bench.logic = ?""",
+            WHERE lo.logic = ?""",
         execute_options={"parameters": [logic_name]},
-        connection=connection,
+        # polars reads from DuckDB connections directly.
+        connection=connection.connection if args.duckdb else connection,
         schema_overrides={"wallclockTime": pl.Float64, "cpuTime": pl.Float64},
     )
     results = (
@@ -5,6 +5,12 @@ import os
 import argparse
 from jinja2 import Environment, PackageLoader, select_autoescape
 from rich.progress import track
+import sys
+from pathlib import Path
+
+# The shared modules are in the parent folder.
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from modules import dbconnect
 
 """
     Writes index.html and the overview of families and logics.
@@ -19,8 +25,14 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("database")
     parser.add_argument("folder", help="output folder")
+    parser.add_argument(
+        "--duckdb",
+        action="store_true",
+        help="the database is a DuckDB file written by export_duckdb.py "
+        "(needs the duckdb package)",
+    )
     args = parser.parse_args()
-    connection = sqlite3.connect(args.database)
+    connection = dbconnect.connect(args.database, args.duckdb)
     connection.row_factory = sqlite3.Row
 
     logics_template = env.get_template("logics.html")
@@ -43,8 +55,8 @@ if __name__ == "__main__":
         res = connection.execute("""
                 SELECT fam.id, fam.name, fam.date FROM Families AS fam
                 JOIN Benchmarks AS bench ON bench.family = fam.id
-                WHERE bench.logic = ?
-                GROUP BY fam.id;
+                WHERE bench.logic = (SELECT id FROM Logics WHERE logic = ?)
+                GROUP BY fam.id, fam.name, fam.date;
             """, (logic,))
         families = res.fetchall()
         logic_data.append({"logic": logic, "families": families})
@@ -65,9 +77,10 @@ if __name__ == "__main__":
 
     for fam in track(families, description="Generating families"):
         res = connection.execute("""
-                SELECT bench.id, bench.logic, bench.name FROM Benchmarks AS bench
+                SELECT bench.id, lo.logic, bench.name FROM Benchmarks AS bench
+                JOIN Logics AS lo ON lo.id = bench.logic
                 WHERE bench.family = ?
-                ORDER BY bench.logic;
+                ORDER BY lo.logic;
             """, (fam['id'],))
 
         benchmarks = res.fetchall()
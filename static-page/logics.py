@@ -7,6 +7,12 @@ import polars as pl
 import altair as alt
 from jinja2 import Environment, PackageLoader, select_autoescape
 from rich.progress import track
+import sys
+from pathlib import Path
+
+# The shared modules are in the parent folder.
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from modules import dbconnect
 
 
 """
@@ -37,9 +43,15 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("database")
     parser.add_argument("folder", help="output directory")
+    parser.add_argument(
+        "--duckdb",
+        action="store_true",
+        help="the database is a DuckDB file written by export_duckdb.py "
+        "(needs the duckdb package)",
+    )
     args = parser.parse_args()
 
-    connection = sqlite3.connect(args.database)
+    connection = dbconnect.connect(args.database, args.duckdb)
     connection.row_factory = sqlite3.Row
     connection.execute("PRAGMA cache_size = 10000;")
 
@@ -85,9 +97,9 @@ if __name__ == "__main__":
                 JOIN Evaluations as eval ON eval.id = res.evaluation
                 WHERE NOT bnch.isIncremental
                 AND eval.date <= ?
-                AND (res.status == 'sat' OR res.status == 'unsat')
-                AND ((qr.status == 'unknown' OR (res.status == qr.status)))
-                AND bnch.logic LIKE ?;
+                AND res.status IN (1, 2) -- sat or unsat
+                AND ((qr.status == 0 OR (res.status == qr.status))) -- 0: unknown
+                AND bnch.logic IN (SELECT id FROM Logics WHERE logic LIKE ?);
                 """,
                 (oldyearstr, logic_name),
             ):
@@ -102,7 +114,7 @@ if __name__ == "__main__":
                 JOIN Evaluations AS eval ON eval.id = res.evaluation
                 WHERE NOT bnch.isIncremental
                 AND eval.date <= ?
-                AND bnch.logic LIKE ?;
+                AND bnch.logic IN (SELECT id FROM Logics WHERE logic LIKE ?);
                 """,
                 (oldyearstr, logic_name),
             ):
@@ -114,7 +126,7 @@ if __name__ == "__main__":
                 SELECT COUNT(bnch.id) FROM Benchmarks AS bnch
                 JOIN Families AS fam ON fam.id = bnch.family
                 WHERE NOT bnch.isIncremental
-                AND bnch.logic LIKE ?
+                AND bnch.logic IN (SELECT id FROM Logics WHERE logic LIKE ?)
                 AND fam.firstOccurrence <= ?;
                 """,
                 (logic_name, yearstr),
@@ -126,7 +138,7 @@ if __name__ == "__main__":
                 """
                 SELECT COUNT(DISTINCT b.id) FROM Benchmarks AS b
                 JOIN Families AS fam ON fam.id = b.family
-                WHERE b.logic LIKE ? AND b.category=? AND fam.firstOccurrence <= ?
+                WHERE b.logic IN (SELECT id FROM Logics WHERE logic LIKE ?) AND b.category=? AND fam.firstOccurrence <= ?
                 """,
                 (logic_name, "crafted", yearstr),
             ):
@@ -135,7 +147,7 @@ if __name__ == "__main__":
                 """
                 SELECT COUNT(DISTINCT b.id) FROM Benchmarks AS b
                 JOIN Families AS fam ON fam.id = b.family
-                WHERE b.logic LIKE ? AND b.category=? AND fam.firstOccurrence <= ?
+                WHERE b.logic IN (SELECT id FROM Logics WHERE logic LIKE ?) AND b.category=? AND fam.firstOccurrence <= ?
                 """,
                 (logic_name, "random", yearstr),
             ):
@@ -144,7 +156,7 @@ if __name__ == "__main__":
                 """
                 SELECT COUNT(DISTINCT b.id) FROM Benchmarks AS b
                 JOIN Families AS fam ON fam.id = b.family
-                WHERE b.logic LIKE ? AND b.category=? AND fam.firstOccurrence <= ?
+                WHERE b.logic IN (SELECT id FROM Logics WHERE logic LIKE ?) AND b.category=? AND fam.firstOccurrence <= ?
                 """,
                 (logic_name, "industrial", yearstr),
             ):
@@ -153,7 +165,7 @@ if __name__ == "__main__":
         res = connection.execute("""
                 SELECT COUNT(bench.id) FROM Families AS fam
                 JOIN Benchmarks AS bench ON bench.family = fam.id
-                WHERE bench.logic LIKE ?
+                WHERE bench.logic IN (SELECT id FROM Logics WHERE logic LIKE ?)
                 GROUP BY fam.id;
             """, (logic_name,))
         family_sizes = res.fetchall()
@@ -161,7 +173,7 @@ if __name__ == "__main__":
 
         res = connection.execute("""
                 SELECT size, compressedSize FROM Benchmarks
-                WHERE logic LIKE ?;
+                WHERE logic IN (SELECT id FROM Logics WHERE logic LIKE ?);
             """, (logic_name,))
         bench_sizes = res.fetchall()
         benchmark_sizes = list(map(lambda x: x['size'], bench_sizes))
@@ -178,7 +190,7 @@ if __name__ == "__main__":
                     INNER JOIN SolverVariants AS sv ON sv.solver = s.id
                     INNER JOIN Results AS r ON sv.id = r.solverVariant
                     INNER JOIN Benchmarks AS b ON b.id = r.query
-                WHERE b.logic LIKE ? AND r.evaluation=? AND b.isIncremental=0
+                WHERE b.logic IN (SELECT id FROM Logics WHERE logic LIKE ?) AND r.evaluation=? AND NOT b.isIncremental
                 """,
                 (logic_name, evalId),
             ):
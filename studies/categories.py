@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
 
 import argparse
-import sqlite3
 import statistics
+import sys
+from pathlib import Path
+
+# The shared modules are in the parent folder.
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from modules import dbconnect
 
 """
     Number of benchmarks per category (crafted, industrial, random) and logic.
@@ -12,20 +17,28 @@ import statistics
 parser = argparse.ArgumentParser()
 
 parser.add_argument("database")
+parser.add_argument(
+    "--duckdb",
+    action="store_true",
+    help="the database is a DuckDB file written by export_duckdb.py "
+    "(needs the duckdb package)",
+)
 
 args = parser.parse_args()
 
-connection = sqlite3.connect(args.database)
+connection = dbconnect.connect(args.database, args.duckdb)
 
 years = list(range(2005, 2025))
 
-res = connection.execute("SELECT DISTINCT logic FROM Benchmarks")
+res = connection.execute(
+    "SELECT id, logic FROM Logics WHERE id IN (SELECT logic FROM Benchmarks)"
+)
 logics = res.fetchall()
 
 categories = ["crafted", "industrial", "random"]
 
 print("Logic;crafted;industrial;random")
-for (logic,) in logics:
+for logicId, logic in logics:
     print(f"{logic}", end="")
     for cat in categories:
         for categoryRow in connection.execute(
@@ -33,7 +46,7 @@ for (logic,) in logics:
             SELECT COUNT(DISTINCT b.id) FROM Benchmarks AS b
             WHERE b.logic=? AND b.category=?
             """,
-            (logic, cat),
+            (logicId, cat),
         ):
             print(f";{categoryRow[0]}", end="")
     print("")
@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
 
 import argparse
-import sqlite3
 import statistics
+import sys
+from pathlib import Path
+
+# The shared modules are in the parent folder.
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from modules import dbconnect
 
 """ Lists benchmarks that have gotten wrong answers in the past.
     What are does?
@@ -14,30 +19,37 @@ import statistics
 parser = argparse.ArgumentParser()
 
 parser.add_argument("database")
+parser.add_argument(
+    "--duckdb",
+    action="store_true",
+    help="the database is a DuckDB file written by export_duckdb.py "
+    "(needs the duckdb package)",
+)
 
 args = parser.parse_args()
 
-connection = sqlite3.connect(args.database)
+connection = dbconnect.connect(args.database, args.duckdb)
 
 # Get age of completely unsovled benchmarks
 res = connection.execute(
     """
-      SELECT bench.id, fam.folderName, bench.logic, bench.name FROM Results AS res1
+      SELECT bench.id, fam.folderName, lo.logic, bench.name FROM Results AS res1
       JOIN Queries AS sub      ON sub.id == res1.query
       JOIN Benchmarks AS bench ON sub.benchmark == bench.id
       JOIN Families AS fam     ON bench.family == fam.id
-      WHERE (res1.status == "sat" OR res1.status == "unsat")
-        AND (sub.inferredStatus == "sat" OR sub.inferredStatus == "unsat")
+      JOIN Logics AS lo        ON bench.logic == lo.id
+      WHERE res1.status IN (1, 2) -- sat or unsat
+        AND sub.inferredStatus IN (1, 2)
         AND res1.status != sub.inferredStatus
         AND NOT EXISTS (
                 SELECT NULL
                 FROM Results AS res2
                 WHERE res1.query == res2.query
                   AND (res1.evaluation == res2.evaluation)
-                  AND ((NOT res1.status == "unsat") OR res2.status == "sat")
-                  AND ((NOT res1.status == "sat"  ) OR res2.status == "unsat")
+                  AND ((NOT res1.status == 2) OR res2.status == 1)
+                  AND ((NOT res1.status == 1) OR res2.status == 2)
             )
-    GROUP BY bench.id;
+    GROUP BY bench.id, fam.folderName, lo.logic, bench.name;
     """
 )
 benchmarks = res.fetchall()
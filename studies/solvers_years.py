@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
 
 import argparse
-import sqlite3
 import statistics
 import matplotlib.pyplot as plt
 import matplot2tikz
+import sys
+from pathlib import Path
+
+# The shared modules are in the parent folder.
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from modules import dbconnect
 
 """
     Prints the number of solvers that participated in each evaluation
@@ -15,14 +20,22 @@ import matplot2tikz
 parser = argparse.ArgumentParser()
 
 parser.add_argument("database")
+parser.add_argument(
+    "--duckdb",
+    action="store_true",
+    help="the database is a DuckDB file written by export_duckdb.py "
+    "(needs the duckdb package)",
+)
 
 args = parser.parse_args()
 
-connection = sqlite3.connect(args.database)
+connection = dbconnect.connect(args.database, args.duckdb)
 
 years = list(range(2005, 2025))
 
-res = connection.execute("SELECT DISTINCT logic FROM Benchmarks")
+res = connection.execute(
+    "SELECT logic FROM Logics WHERE id IN (SELECT logic FROM Benchmarks)"
+)
 # logics = res.fetchall()
 # logics.append(("%",))
 logics = [("%",)]
@@ -45,7 +58,7 @@ for evalId, evalName, evalDate in evaluations:
                 INNER JOIN SolverVariants AS sv ON sv.solver = s.id
                 INNER JOIN Results AS r ON sv.id = r.solverVariant
                 INNER JOIN Benchmarks AS b ON b.id = r.query
-            WHERE b.logic LIKE ? AND r.evaluation=? AND b.isIncremental=0
+            WHERE b.logic IN (SELECT id FROM Logics WHERE logic LIKE ?) AND r.evaluation=? AND NOT b.isIncremental
             """,
             (logic, evalId),
         ):
@@ -10,22 +10,33 @@ Prints for each year:
 
 
 import argparse
-import sqlite3
 import matplotlib.pyplot as plt
 import matplot2tikz
 import numpy as np
+import sys
+from pathlib import Path
+
+# The shared modules are in the parent folder.
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from modules import dbconnect
 
 parser = argparse.ArgumentParser()
 
 parser.add_argument("database")
 parser.add_argument("--logic", default="ALL")
+parser.add_argument(
+    "--duckdb",
+    action="store_true",
+    help="the database is a DuckDB file written by export_duckdb.py "
+    "(needs the duckdb package)",
+)
 
 args = parser.parse_args()
 
 if args.logic == "ALL":
     args.logic = "%"
 
-connection = sqlite3.connect(args.database)
+connection = dbconnect.connect(args.database, args.duckdb)
 
 years = list(range(2005, 2025))
 fresh = []
@@ -47,9 +58,9 @@ for year in years:
         JOIN Evaluations as eval ON eval.id = res.evaluation
         WHERE NOT bnch.isIncremental
         AND eval.date <= ?
-        AND (res.status == 'sat' OR res.status == 'unsat')
-        AND ((qr.status == 'unknown' OR (res.status == qr.status)))
-        AND bnch.logic LIKE ?;
+        AND res.status IN (1, 2) -- sat or unsat
+        AND ((qr.status == 0 OR (res.status == qr.status))) -- 0: unknown
+        AND bnch.logic IN (SELECT id FROM Logics WHERE logic LIKE ?);
         """,
         (oldyearstr, args.logic),
     ):
@@ -64,7 +75,7 @@ for year in years:
         JOIN Evaluations AS eval ON eval.id = res.evaluation
         WHERE NOT bnch.isIncremental
         AND eval.date <= ?
-        AND bnch.logic LIKE ?;
+        AND bnch.logic IN (SELECT id FROM Logics WHERE logic LIKE ?);
         """,
         (oldyearstr, args.logic),
     ):
@@ -76,7 +87,7 @@ for year in years:
         SELECT COUNT(bnch.id) FROM Benchmarks AS bnch
         JOIN Families AS fam ON fam.id = bnch.family
         WHERE NOT bnch.isIncremental
-        AND bnch.logic LIKE ?
+        AND bnch.logic IN (SELECT id FROM Logics WHERE logic LIKE ?)
         AND fam.firstOccurrence <= ?;
         """,
         (args.logic, yearstr),
@@ -87,7 +98,7 @@ for year in years:
         """
         SELECT COUNT(DISTINCT b.id) FROM Benchmarks AS b
         JOIN Families AS fam ON fam.id = b.family
-        WHERE b.logic LIKE ? AND b.category=? AND fam.firstOccurrence <= ?
+        WHERE b.logic IN (SELECT id FROM Logics WHERE logic LIKE ?) AND b.category=? AND fam.firstOccurrence <= ?
         AND NOT b.isIncremental
         """,
         (args.logic, "crafted", yearstr),
@@ -97,7 +108,7 @@ for year in years:
         """
         SELECT COUNT(DISTINCT b.id) FROM Benchmarks AS b
         JOIN Families AS fam ON fam.id = b.family
-        WHERE b.logic LIKE ? AND b.category=? AND fam.firstOccurrence <= ?
+        WHERE b.logic IN (SELECT id FROM Logics WHERE logic LIKE ?) AND b.category=? AND fam.firstOccurrence <= ?
         AND NOT b.isIncremental
         """,
         (args.logic, "random", yearstr),
@@ -107,7 +118,7 @@ for year in years:
         """
         SELECT COUNT(DISTINCT b.id) FROM Benchmarks AS b
         JOIN Families AS fam ON fam.id = b.family
-        WHERE b.logic LIKE ? AND b.category=? AND fam.firstOccurrence <= ?
+        WHERE b.logic IN (SELECT id FROM Logics WHERE logic LIKE ?) AND b.category=? AND fam.firstOccurrence <= ?
         AND NOT b.isIncremental
         """,
         (args.logic, "industrial", yearstr),
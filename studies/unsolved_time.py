@@ -1,20 +1,31 @@
 #!/usr/bin/env python3
 
 import argparse
-import sqlite3
 import statistics
+import sys
+from pathlib import Path
+
+# The shared modules are in the parent folder.
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from modules import dbconnect
 
 parser = argparse.ArgumentParser()
 
 parser.add_argument("database")
 parser.add_argument("--logic", default="ALL")
+parser.add_argument(
+    "--duckdb",
+    action="store_true",
+    help="the database is a DuckDB file written by export_duckdb.py "
+    "(needs the duckdb package)",
+)
 
 args = parser.parse_args()
 
 if args.logic == "ALL":
     args.logic = "%"
 
-connection = sqlite3.connect(args.database)
+connection = dbconnect.connect(args.database, args.duckdb)
 
 # Get age of completely unsovled benchmarks
 res = connection.execute(
@@ -23,10 +34,10 @@ res = connection.execute(
     JOIN Queries  AS qr  ON qr.benchmark = bnch.id
     JOIN Families AS fam ON fam.id = bnch.family
     WHERE NOT bnch.isIncremental
-    AND bnch.logic LIKE ?
+    AND bnch.logic IN (SELECT id FROM Logics WHERE logic LIKE ?)
     AND NOT EXISTS (
         SELECT * FROM Results AS res WHERE
-            (res.status == 'sat' OR res.status == 'unsat')
+            res.status IN (1, 2) -- sat or unsat
         AND res.query = qr.id
     );
     """,
@@ -53,14 +64,14 @@ print(f"Geometric Mean: {statistics.geometric_mean(yearold):.2f}")
 # Get distance between first occurence and solving time
 res = connection.execute(
     """
-    SELECT bnch.id, MIN(CAST(strftime('%Y', eval.date) as INTEGER) - CAST(strftime('%Y', fam.firstOccurrence) as INTEGER))  FROM Benchmarks AS bnch
+    SELECT bnch.id, MIN(CAST(SUBSTR(eval.date, 1, 4) as INTEGER) - CAST(SUBSTR(fam.firstOccurrence, 1, 4) as INTEGER))  FROM Benchmarks AS bnch
     JOIN Queries  AS qr  ON qr.benchmark = bnch.id
     JOIN Families AS fam ON fam.id = bnch.family
     JOIN Results AS res ON res.query = qr.id
     JOIN Evaluations as eval ON eval.id = res.evaluation
     WHERE NOT bnch.isIncremental
-    AND bnch.logic LIKE ?
-    AND (res.status == 'sat' OR res.status == 'unsat')
+    AND bnch.logic IN (SELECT id FROM Logics WHERE logic LIKE ?)
+    AND res.status IN (1, 2) -- sat or unsat
     GROUP BY bnch.id;
     """,
     (args.logic,),
@@ -11,7 +11,7 @@ echo "Prepopulate"
 
 echo "Add benchmarks"
 
-find ~/Work/SMT-LIB-db/SMT-LIB-ss/ -name '*smt2' | parallel -j 4 ./addbenchmark.py $DB $DOLMEN_BIN
+./bulkadd.py $DB $DOLMEN_BIN ~/Work/SMT-LIB-db/SMT-LIB-ss/
 
 echo "Postpopulate"
 
@@ -0,0 +1,161 @@
+"""
+End-to-end tests of `bulkadd.py`.  klhm and Dolmen are replaced by small
+scripts, such that the tests run without the tools.
+"""
+
+import os
+import sys
+import sqlite3
+import subprocess
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parent.parent
+
+FAKE_KLHM = """#!/usr/bin/env python3
+import sys, json
+
+query = {
+    "normalizedSize": 1,
+    "compressedSize": 1,
+    "assertsCount": 1,
+    "declareFunCount": 0,
+    "declareConstCount": 0,
+    "declareSortCount": 0,
+    "defineFunCount": 0,
+    "defineFunRecCount": 0,
+    "constantFunCount": 0,
+    "defineSortCount": 0,
+    "declareDatatypeCount": 0,
+    "maxTermDepth": 1,
+    "status": "sat",
+    "symbolFrequency": [1],
+}
+for line in sys.stdin:
+    path = line.strip()
+    size = len(open(path, "rb").read())
+    benchmark = {
+        "logic": "QF_BV",
+        "size": size,
+        "compressedSize": size,
+        "license": None,
+        "generatedOn": None,
+        "generatedBy": None,
+        "targetSolver": None,
+        "timeLimit": None,
+        "generator": None,
+        "application": None,
+        "description": None,
+        "category": "industrial",
+        "queryCount": 1,
+        "isIncremental": False,
+    }
+    print(json.dumps({"path": path, "query": query}))
+    print(json.dumps({"path": path, "benchmark": benchmark}), flush=True)
+"""
+
+FAKE_DOLMEN = """#!/bin/sh
+exit 0
+"""
+
+
+def write_script(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    path.chmod(0o755)
+
+
+def run(tmp_path, script, *args):
+    return subprocess.run(
+        [sys.executable, str(REPO / script), *map(str, args)],
+        cwd=tmp_path,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+
+def bulkadd(tmp_path, *args):
+    dolmen = tmp_path / "dolmen"
+    return run(tmp_path, "bulkadd.py", "db.sqlite", dolmen, "lib", "-j", "1", *args)
+
+
+def setup_library(tmp_path):
+    # The scripts find klhm and the symbol list relative to the working
+    # directory.
+    (tmp_path / "klhm").mkdir()
+    os.symlink(REPO / "klhm" / "src", tmp_path / "klhm" / "src")
+    write_script(tmp_path / "klhm" / "zig-out" / "bin" / "klhm", FAKE_KLHM)
+    write_script(tmp_path / "dolmen", FAKE_DOLMEN)
+    family = tmp_path / "lib" / "non-incremental" / "QF_BV" / "20200101-fam"
+    family.mkdir(parents=True)
+    result = run(tmp_path, "prepopulate.py", "db.sqlite")
+    assert result.returncode == 0, result.stderr
+    return family
+
+
+def benchmark_hashes(tmp_path):
+    connection = sqlite3.connect(tmp_path / "db.sqlite")
+    hashes = dict(connection.execute("SELECT name, contentHash FROM Benchmarks"))
+    connection.close()
+    return hashes
+
+
+@pytest.mark.parametrize("withLaterBenchmark", [False, True])
+def test_new_file_with_old_content_of_changed_file(tmp_path, withLaterBenchmark):
+    """
+    A new file gets the old content of a file that changes in the same
+    incremental run.  The old benchmark of the changed file is replaced, so
+    the new file must be analyzed, not copied from it.  Without a later
+    benchmark, the replacement reuses the id of the old benchmark.
+    """
+    family = setup_library(tmp_path)
+    (family / "a.smt2").write_text("(check-sat)\n")
+    if withLaterBenchmark:
+        (family / "z.smt2").write_text("(check-sat)\n(exit)\n")
+    result = bulkadd(tmp_path)
+    assert result.returncode == 0, result.stdout + result.stderr
+    oldHash = benchmark_hashes(tmp_path)["a.smt2"]
+
+    (family / "a.smt2").write_text("(assert true)\n(check-sat)\n")
+    (family / "b.smt2").write_text("(check-sat)\n")
+    result = bulkadd(tmp_path, "--incremental")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    hashes = benchmark_hashes(tmp_path)
+    assert len(hashes) == (3 if withLaterBenchmark else 2)
+    assert hashes["b.smt2"] == oldHash
+    assert hashes["a.smt2"] != oldHash
+
+
+def test_new_file_with_content_of_unchanged_file(tmp_path):
+    """
+    A new file with the content of an unchanged file is copied.
+    """
+    family = setup_library(tmp_path)
+    (family / "a.smt2").write_text("(check-sat)\n")
+    result = bulkadd(tmp_path)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    (family / "b.smt2").write_text("(check-sat)\n")
+    result = bulkadd(tmp_path, "--incremental")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    hashes = benchmark_hashes(tmp_path)
+    assert hashes["a.smt2"] == hashes["b.smt2"]
+
+
+def test_database_without_tables(tmp_path):
+    """
+    If the writer cannot read the database, the run fails instead of
+    blocking once the queue of the writer is full.
+    """
+    family = setup_library(tmp_path)
+    os.remove(tmp_path / "db.sqlite")
+    sqlite3.connect(tmp_path / "db.sqlite").close()
+    for i in range(10):
+        (family / f"b{i}.smt2").write_text("(check-sat)\n" * (i + 1))
+    result = bulkadd(tmp_path, "--batch-size", "1")
+    assert result.returncode != 0
+    assert "no such table" in result.stderr
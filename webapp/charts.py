@@ -11,6 +11,7 @@ from collections import defaultdict
 from random import Random
 import math
 import sklearn
+from modules import statuses
 
 U = TypeVar("U")
 
@@ -99,17 +100,18 @@ def read_feather() -> pl.DataFrame:
             query="""
                 SELECT ev.name as eval_name, ev.date, ev.link, ev.id as ev_id, sol.name AS solver_name,
                         sovar.fullName, res.status, res.cpuTime,
-                        query.id, bench.logic, sovar.id AS sovar_id
+                        query.id, lo.logic, sovar.id AS sovar_id
                     FROM Results AS res
                     INNER JOIN Benchmarks AS bench ON bench.id = query.benchmark
+                    INNER JOIN Logics AS lo ON lo.id = bench.logic
                     INNER JOIN Queries AS query ON res.query = query.id
                     INNER JOIN Evaluations AS ev ON res.evaluation = ev.id
                     INNER JOIN SolverVariants AS sovar ON res.solverVariant = sovar.id
                     INNER JOIN Solvers AS sol ON sovar.solver = sol.id
                     """,
             connection=db,
-            schema_overrides={"wallclockTime": pl.Float64, "cpuTime": pl.Float64, "solver_name": pl.Categorical, "fullName": pl.Categorical,"sovar_id" : pl.Int32, "status" : pl.Categorical},
-        )
+            schema_overrides={"wallclockTime": pl.Float64, "cpuTime": pl.Float64, "solver_name": pl.Categorical, "fullName": pl.Categorical,"sovar_id" : pl.Int32, "status" : pl.UInt8},
+        ).with_columns(status=c_status.replace_strict(statuses.names, return_dtype=pl.Categorical))
         df.write_ipc(FEATHER)
         return df
 
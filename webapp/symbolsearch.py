@@ -0,0 +1,53 @@
+import time
+from flask import abort, jsonify, request
+
+from modules import symbolindex
+
+
+def init_routes(app, get_db):
+    @app.route("/symbols/search")
+    def search_symbols():
+        """
+        Searches queries by symbol counts, see `modules/symbolindex.py` for
+        the syntax of the expression `q`.  Returns JSON with the number of
+        matching queries and the first `limit` of them.  Without the index
+        of the database the answer is 404.
+        """
+        expression = request.args.get("q", default="", type=str)
+        limit = request.args.get("limit", default=100, type=int)
+        if limit < 1:
+            abort(400, description="The limit must be at least 1.")
+        connection = get_db()
+        start = time.perf_counter()
+        try:
+            index = symbolindex.SymbolIndex(connection)
+        except symbolindex.MissingIndexError as e:
+            abort(404, description=str(e))
+        try:
+            count = index.count(expression)
+            queryIds = index.search(expression, limit)
+        except ValueError as e:
+            abort(400, description=str(e))
+        milliseconds = (time.perf_counter() - start) * 1000
+
+        queries = []
+        for queryId in queryIds:
+            for row in connection.execute(
+                """
+                SELECT q.id, q.idx, b.id AS benchmark, b.name, lo.logic,
+                       f.folderName AS family, b.isIncremental
+                FROM Queries AS q
+                INNER JOIN Benchmarks AS b ON b.id = q.benchmark
+                INNER JOIN Families AS f ON f.id = b.family
+                INNER JOIN Logics AS lo ON lo.id = b.logic
+                WHERE q.id=?
+                """,
+                (queryId,),
+            ):
+                queries.append(dict(row))
+        return jsonify(
+            expression=expression,
+            count=count,
+            milliseconds=round(milliseconds, 1),
+            queries=queries,
+        )
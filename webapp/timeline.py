@@ -32,8 +32,8 @@ def init_routes(app, get_db):
                 JOIN Evaluations as eval ON eval.id = res.evaluation
                 WHERE NOT bnch.isIncremental
                 AND eval.date <= ?
-                AND (res.status == 'sat' OR res.status == 'unsat')
-                AND bnch.logic LIKE ?;
+                AND res.status IN (1, 2) -- sat or unsat
+                AND bnch.logic IN (SELECT id FROM Logics WHERE logic LIKE ?);
                 """,
                 (oldyearstr, logic_name),
             ):
@@ -48,7 +48,7 @@ def init_routes(app, get_db):
                 JOIN Evaluations AS eval ON eval.id = res.evaluation
                 WHERE NOT bnch.isIncremental
                 AND eval.date <= ?
-                AND bnch.logic LIKE ?;
+                AND bnch.logic IN (SELECT id FROM Logics WHERE logic LIKE ?);
                 """,
                 (oldyearstr, logic_name),
             ):
@@ -60,7 +60,7 @@ def init_routes(app, get_db):
                 SELECT COUNT(bnch.id) FROM Benchmarks AS bnch
                 JOIN Families AS fam ON fam.id = bnch.family
                 WHERE NOT bnch.isIncremental
-                AND bnch.logic LIKE ?
+                AND bnch.logic IN (SELECT id FROM Logics WHERE logic LIKE ?)
                 AND fam.firstOccurrence <= ?;
                 """,
                 (logic_name, yearstr),
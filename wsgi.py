@@ -3,7 +3,9 @@ This is a simple webapp that lets users visualize the data stored for
 individual benchmarks.
 
 It is built on top of flask.  It expects the environment variable `SMTLIB_DB`
-to be set to the filepath of the database file to use.
+to be set to the filepath of the database file to use.  If the file is a
+release file written by `finalize.py`, which is never modified, set
+`SMTLIB_DB_IMMUTABLE=1` to open it without locking.
 
 To run a local test server execute:
     SMTLIB_DB=./smtlib2025.sqlite flask --app wsgi run
@@ -19,19 +21,39 @@ from typing import *
 from collections import defaultdict
 from random import Random
 import math
-from webapp import charts, timeline
+from webapp import charts, timeline, symbolsearch
+from modules import symbolvectors
 
 DATABASE = os.environ["SMTLIB_DB"]
+IMMUTABLE = os.environ.get("SMTLIB_DB_IMMUTABLE") == "1"
 
 
 def get_db():
     db = getattr(g, "_database", None)
     if db is None:
-        db = g._database = sqlite3.connect(DATABASE)
+        if IMMUTABLE:
+            uri = Path(DATABASE).resolve().as_uri() + "?immutable=1"
+            db = g._database = sqlite3.connect(uri, uri=True)
+        else:
+            db = g._database = sqlite3.connect(DATABASE)
         db.cursor().execute(f"PRAGMA cache_size=-10000;")
     db.row_factory = sqlite3.Row
     return db
 
+
+symbol_names = None
+
+
+def get_symbol_counts(cur, blob):
+    """
+    Decodes a packed symbol frequency vector.  The symbol names are read
+    from the database once.
+    """
+    global symbol_names
+    if symbol_names == None:
+        symbol_names = symbolvectors.symbol_names(cur)
+    return symbolvectors.named_counts(blob, symbol_names)
+
 # def convert_to_df():
 #     df = pl.read_database(
 #         query="""
@@ -66,6 +88,7 @@ def get_db():
 app = Flask(__name__, static_folder="webapp/static", template_folder="webapp/templates")
 charts.init_routes(app, get_db)
 timeline.init_routes(app, get_db)
+symbolsearch.init_routes(app, get_db)
 
 
 @app.route("/")
@@ -76,7 +99,7 @@ def index():
 def get_benchmark(cursor, benchmark_id):
     for row in cursor.execute(
         """
-        SELECT b.id, b.name, logic, s.folderName, s.date, isIncremental, size,
+        SELECT b.id, b.name, lo.logic, s.folderName, s.date, isIncremental, size,
                b.compressedSize, l.name, l.link, l.spdxIdentifier, generatedOn,
                generatedBy, generator, application, description, category,
                passesDolmen, passesDolmenStrict,
@@ -86,6 +109,7 @@ def get_benchmark(cursor, benchmark_id):
                FROM Benchmarks AS b
                   INNER JOIN Families AS s ON s.Id = b.family
                   INNER JOIN Licenses AS l ON l.Id = b.license
+                  INNER JOIN Logics AS lo ON lo.id = b.logic
         WHERE b.id=?""",
         (benchmark_id,),
     ):
@@ -108,7 +132,10 @@ def get_queries(cursor, benchmark_id):
 def get_query(cursor, query_id):
     for row in cursor.execute(
         """
-        SELECT * FROM Queries AS u
+        SELECT u.*, s.name AS statusName, i.name AS inferredStatusName
+        FROM Queries AS u
+        LEFT JOIN Statuses AS s ON s.id = u.status
+        LEFT JOIN Statuses AS i ON i.id = u.inferredStatus
         WHERE u.id=?""",
         (query_id,),
     ):
@@ -127,9 +154,11 @@ def get_canonical_benchmark_data(cursor, benchmark_id):
         res = cursor.execute(
             """
             SELECT ev.name, ev.date, ev.link, sol.name AS solverName,
-                   sovar.fullName, res.status, res.wallclockTime, res.cpuTime,
-                   rat.rating, rat.consideredSolvers, rat.successfulSolvers
+                   sovar.fullName, st.name AS status, res.wallclockTime,
+                   res.cpuTime, rat.rating, rat.consideredSolvers,
+                   rat.successfulSolvers
             FROM Results AS res
+            INNER JOIN Statuses AS st ON res.status = st.id
             INNER JOIN Evaluations AS ev ON res.evaluation = ev.id
             INNER JOIN SolverVariants AS sovar ON res.solverVariant = sovar.id
             INNER JOIN Solvers AS sol ON sovar.solver = sol.id
@@ -151,16 +180,7 @@ def dynamic_benchmark(benchmark_id):
         cur, benchmark_id
     )
     if benchmark:
-        res = cur.execute(
-            """
-            SELECT s.name,sc.count FROM SymbolCounts AS sc
-            INNER JOIN Symbols AS s ON s.id = sc.symbol
-            WHERE sc.query=?
-            ORDER BY s.id
-            """,
-            (first["id"],),
-        )
-        symbols = res.fetchall()
+        symbols = get_symbol_counts(cur, first["symbolFrequency"])
         return render_template(
             "benchmark.html",
             queries=queries,
@@ -177,22 +197,15 @@ def dynamic_query(query_id):
     cur = get_db().cursor()
     sb = get_query(cur, query_id)
     if sb:
-        res = cur.execute(
-            """
-            SELECT s.name,sc.count FROM SymbolCounts AS sc
-            INNER JOIN Symbols AS s ON s.id = sc.symbol
-            WHERE sc.query=?
-            ORDER BY s.id
-            """,
-            (query_id,),
-        )
-        symbols = res.fetchall()
+        symbols = get_symbol_counts(cur, sb["symbolFrequency"])
         res = cur.execute(
             """
             SELECT ev.name, ev.date, ev.link, sol.name AS solverName,
-                   sovar.fullName, res.status, res.wallclockTime, res.cpuTime,
-                   rat.rating, rat.consideredSolvers, rat.successfulSolvers
+                   sovar.fullName, st.name AS status, res.wallclockTime,
+                   res.cpuTime, rat.rating, rat.consideredSolvers,
+                   rat.successfulSolvers
             FROM Results AS res
+            INNER JOIN Statuses AS st ON res.status = st.id
             INNER JOIN Evaluations AS ev ON res.evaluation = ev.id
             INNER JOIN SolverVariants AS sovar ON res.solverVariant = sovar.id
             INNER JOIN Solvers AS sol ON sovar.solver = sol.id
@@ -223,14 +236,7 @@ def show_benchmark(benchmark_id):
             "date": benchmark["date"],
         }
         benchmarkData = {"id": benchmark["id"], "name": benchmark["name"]}
-        res = cur.execute(
-            """
-            SELECT s.name,sc.count FROM SymbolCounts AS sc
-            INNER JOIN Symbols AS s ON s.id = sc.symbol
-            WHERE sc.query=?""",
-            (first["id"],),
-        )
-        symbols = res.fetchall()
+        symbols = get_symbol_counts(cur, first["symbolFrequency"])
 
         return render_template(
             "index.html",
@@ -253,7 +259,11 @@ def retrieve_picked_data(cur, request):
     benchmarkData = None
     if "logic-id" in request.form:
         for row in cur.execute(
-            "SELECT id,logic FROM Benchmarks WHERE id=?",
+            """
+            SELECT b.id, lo.logic FROM Benchmarks AS b
+            INNER JOIN Logics AS lo ON lo.id = b.logic
+            WHERE b.id=?
+            """,
             (request.form["logic-id"],),
         ):
             logicData = row
@@ -282,11 +292,12 @@ def search_logic():
     if family and benchmark:
         ret = cur.execute(
             """
-           SELECT id,logic FROM Benchmarks
-           WHERE logic LIKE '%'||?||'%'
-           AND family=? AND id=?
-           GROUP BY logic
-           ORDER BY logic ASC
+           SELECT MIN(b.id) AS id, lo.logic FROM Logics AS lo
+           INNER JOIN Benchmarks AS b ON b.logic = lo.id
+           WHERE lo.logic LIKE '%'||?||'%'
+           AND b.family=? AND b.id=?
+           GROUP BY lo.id
+           ORDER BY lo.logic ASC
            LIMIT 101
            """,
             (logic, family, benchmark),
@@ -294,11 +305,12 @@ def search_logic():
     elif family:
         ret = cur.execute(
             """
-           SELECT id,logic FROM Benchmarks
-           WHERE logic LIKE '%'||?||'%'
-           AND family=?
-           GROUP BY logic
-           ORDER BY logic ASC
+           SELECT MIN(b.id) AS id, lo.logic FROM Logics AS lo
+           INNER JOIN Benchmarks AS b ON b.logic = lo.id
+           WHERE lo.logic LIKE '%'||?||'%'
+           AND b.family=?
+           GROUP BY lo.id
+           ORDER BY lo.logic ASC
            LIMIT 101
            """,
             (logic, family),
@@ -306,10 +318,11 @@ def search_logic():
     elif benchmark:
         ret = cur.execute(
             """
-           SELECT id,logic FROM Benchmarks
-           WHERE logic LIKE '%'||?||'%' AND id=?
-           GROUP BY logic
-           ORDER BY logic ASC
+           SELECT MIN(b.id) AS id, lo.logic FROM Logics AS lo
+           INNER JOIN Benchmarks AS b ON b.logic = lo.id
+           WHERE lo.logic LIKE '%'||?||'%' AND b.id=?
+           GROUP BY lo.id
+           ORDER BY lo.logic ASC
            LIMIT 101
            """,
             (logic, benchmark),
@@ -317,10 +330,11 @@ def search_logic():
     else:
         ret = cur.execute(
             """
-           SELECT id,logic FROM Benchmarks
-           WHERE logic LIKE '%'||?||'%'
-           GROUP BY logic
-           ORDER BY logic ASC
+           SELECT MIN(b.id) AS id, lo.logic FROM Logics AS lo
+           INNER JOIN Benchmarks AS b ON b.logic = lo.id
+           WHERE lo.logic LIKE '%'||?||'%'
+           GROUP BY lo.id
+           ORDER BY lo.logic ASC
            LIMIT 101
            """,
             (logic,),
@@ -339,7 +353,11 @@ def pick_logic(logic_id):
     # has that logic.
     cur = get_db().cursor()
     for row in cur.execute(
-        "SELECT id,logic FROM Benchmarks WHERE id=?",
+        """
+        SELECT b.id, lo.logic FROM Benchmarks AS b
+        INNER JOIN Logics AS lo ON lo.id = b.logic
+        WHERE b.id=?
+        """,
         (logic_id,),
     ):
         logicData, familyData, benchmarkData = retrieve_picked_data(cur, request)
@@ -375,7 +393,8 @@ def search_family():
             """
              SELECT s.id,s.date,s.name,s.folderName FROM Families AS s
              INNER JOIN Benchmarks AS b ON b.family = s.id
-             WHERE s.name LIKE '%'||?||'%' AND b.logic=?
+             WHERE s.name LIKE '%'||?||'%'
+             AND b.logic=(SELECT id FROM Logics WHERE logic=?)
              GROUP BY s.folderName
              ORDER BY s.date ASC,
                       s.name ASC
@@ -484,7 +503,11 @@ def pick_benchmark(benchmark_id):
     # has that benchmark.
     cur = get_db().cursor()
     for row in cur.execute(
-        "SELECT id,name,logic,family FROM Benchmarks WHERE id=?",
+        """
+        SELECT b.id, b.name, lo.logic, b.family FROM Benchmarks AS b
+        INNER JOIN Logics AS lo ON lo.id = b.logic
+        WHERE b.id=?
+        """,
         (benchmark_id,),
     ):
         logicData = {"id": row["id"], "logic": row["logic"]}